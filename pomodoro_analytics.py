@@ -0,0 +1,208 @@
+"""Statistiques de productivité sur tout l'historique.
+
+Les séances sont lues en colonnes de largeur fixe (array de la bibliothèque
+standard). Chaque refresh() ne lit que les séances d'identifiant supérieur
+au dernier vu et agrège ce lot en un seul passage ; seuls les agrégats sont
+conservés, les colonnes du lot sont ensuite libérées. Les totaux consolidés
+par HistoryStore.roll_up() sont repris au premier chargement.
+"""
+import time
+from array import array
+from datetime import date
+
+from pomodoro_core import SESSION_TYPES
+from pomodoro_history import local_day
+
+WORK, BREAK, LONG_BREAK = range(len(SESSION_TYPES))
+TYPE_CODES = {name: code for code, name in enumerate(SESSION_TYPES)}
+
+
+class SessionColumns:
+    """Séances en colonnes de largeur fixe (26 octets par séance) ; les lignes
+    se lisent par des vues SessionRecord, sans copie."""
+
+    __slots__ = ("ids", "types", "durations", "completed_at", "skipped")
+
+    def __init__(self, rows=()):
+        self.ids = array("q")
+        self.types = array("b")
+        self.durations = array("l")
+        self.completed_at = array("d")
+        self.skipped = array("b")
+        self.extend(rows)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if not -len(self.ids) <= index < len(self.ids):
+            raise IndexError(index)
+        return SessionRecord(self, index % len(self.ids))
+
+    def extend(self, rows):
+        # rows : (id, type, durée, horodatage, passée). Colonnes remplies par
+        # lot : listes Python, puis un extend par colonne.
+        ids, types, durations, completed, skipped = [], [], [], [], []
+        for row_id, session_type, duration, completed_at, was_skipped in rows:
+            code = TYPE_CODES.get(session_type)
+            if code is None:
+                continue
+            ids.append(row_id)
+            types.append(code)
+            durations.append(duration)
+            completed.append(completed_at)
+            skipped.append(1 if was_skipped else 0)
+        self.ids.extend(ids)
+        self.types.extend(types)
+        self.durations.extend(durations)
+        self.completed_at.extend(completed)
+        self.skipped.extend(skipped)
+
+
+class SessionRecord:
+    __slots__ = ("columns", "index")
+
+    def __init__(self, columns, index):
+        self.columns = columns
+        self.index = index
+
+    @property
+    def id(self):
+        return self.columns.ids[self.index]
+
+    @property
+    def session_type(self):
+        return SESSION_TYPES[self.columns.types[self.index]]
+
+    @property
+    def duration(self):
+        return self.columns.durations[self.index]
+
+    @property
+    def completed_at(self):
+        return self.columns.completed_at[self.index]
+
+    @property
+    def skipped(self):
+        return bool(self.columns.skipped[self.index])
+
+
+class Analytics:
+    """Agrégats incrémentaux : carte heure × jour de semaine, minutes de
+    concentration par jour, séances terminées et passées par type."""
+
+    def __init__(self):
+        self.last_id = 0
+        self.version = 0
+        self.heatmap = array("l", [0] * (7 * 24))
+        self.day_minutes = {}
+        self.completed = array("l", [0] * len(SESSION_TYPES))
+        self.skipped = array("l", [0] * len(SESSION_TYPES))
+        self.minutes = array("l", [0] * len(SESSION_TYPES))
+        self._rollups_loaded = False
+        self._cache = {}
+
+    def refresh(self, store):
+        """Intègre les séances ajoutées au store depuis le dernier appel."""
+        with store.read_snapshot():
+            if not self._rollups_loaded:
+                self._rollups_loaded = True
+                self._addRollups(store.daily_rollups(), store.heatmap_rollups())
+            batch = SessionColumns(store.rows_after(self.last_id))
+        if not len(batch):
+            return 0
+        self._accumulate(batch)
+        self.last_id = max(self.last_id, max(batch.ids))
+        self.version += 1
+        self._cache.clear()
+        return len(batch)
+
+    def _addRollups(self, days, heatmap):
+        completed, skipped, minutes = self.completed, self.skipped, self.minutes
+        for day, session_type, n_completed, completed_minutes, n_skipped, _ in days:
+            code = TYPE_CODES.get(session_type)
+            if code is None:
+                continue
+            completed[code] += n_completed
+            skipped[code] += n_skipped
+            minutes[code] += completed_minutes
+            if code == WORK and n_completed:
+                self.day_minutes[day] = self.day_minutes.get(day, 0) + completed_minutes
+        for weekday, hour, sessions in heatmap:
+            self.heatmap[weekday * 24 + hour] += sessions
+
+    def _accumulate(self, batch):
+        localtime = time.localtime
+        heatmap, day_minutes = self.heatmap, self.day_minutes
+        completed, skipped, minutes = self.completed, self.skipped, self.minutes
+        for code, duration, completed_at, was_skipped in zip(
+                batch.types, batch.durations, batch.completed_at, batch.skipped):
+            if was_skipped:
+                skipped[code] += 1
+                continue
+            completed[code] += 1
+            minutes[code] += duration // 60
+            if code == WORK:
+                local = localtime(completed_at)
+                heatmap[local.tm_wday * 24 + local.tm_hour] += 1
+                day = local_day(completed_at, local)
+                day_minutes[day] = day_minutes.get(day, 0) + duration // 60
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    # --- indicateurs ---
+    def completion_ratio(self, session_type="work"):
+        code = TYPE_CODES[session_type]
+        total = self.completed[code] + self.skipped[code]
+        return self.completed[code] / total if total else None
+
+    def break_work_ratio(self):
+        # Minutes de pause (courtes et longues) par minute de travail.
+        work = self.minutes[WORK]
+        return (self.minutes[BREAK] + self.minutes[LONG_BREAK]) / work if work else None
+
+    @staticmethod
+    def planned_break_work_ratio(settings):
+        # Ratio prévu par un cycle complet de sessions_until_long_break séances.
+        n = settings["sessions_until_long_break"]
+        breaks = (n - 1) * settings["break_duration"] + settings["long_break_duration"]
+        return breaks / (n * settings["work_duration"])
+
+    def long_break_share(self):
+        # Pauses longues prises par séance de travail terminée (1/n attendu).
+        work = self.completed[WORK]
+        return self.completed[LONG_BREAK] / work if work else None
+
+    def daily_minutes(self, days=90, today=None):
+        """Minutes de travail des `days` derniers jours, du plus ancien au plus récent."""
+        today = (today or date.today()).toordinal()
+        return self._cached(("daily", days, today), lambda: array(
+            "l", (self.day_minutes.get(day, 0) for day in range(today - days + 1, today + 1))))
+
+    def rolling_average(self, window=7, days=90, today=None):
+        """Moyenne glissante sur `window` jours des minutes de travail quotidiennes."""
+        today = (today or date.today()).toordinal()
+
+        def compute():
+            first = today - days - window + 2
+            prefix = array("l", [0])
+            for day in range(first, today + 1):
+                prefix.append(prefix[-1] + self.day_minutes.get(day, 0))
+            return array("d", ((prefix[i + window] - prefix[i]) / window for i in range(days)))
+
+        return self._cached(("rolling", window, days, today), compute)
+
+    def summary(self, settings, today=None):
+        return {
+            "sessions": self.completed[WORK],
+            "completion_ratio": self.completion_ratio("work"),
+            "break_work_ratio": self.break_work_ratio(),
+            "planned_break_work_ratio": self.planned_break_work_ratio(settings),
+            "long_break_share": self.long_break_share(),
+            "planned_long_break_share": 1 / settings["sessions_until_long_break"],
+            "average_7d": self.rolling_average(7, 1, today)[-1],
+            "average_30d": self.rolling_average(30, 1, today)[-1]
+        }
@@ -0,0 +1,424 @@
+"""Banc d'essai hors écran de Pomodoro Pro Ultra.
+
+Mesure le coût de rendu du cadran, de l'animation (avec 7 et 300
+décorations), du démarrage de l'application, la consommation CPU au repos
+et la dérive du timer, puis écrit un rapport JSON comparable d'une
+révision à l'autre :
+
+    python pomodoro_bench.py --output avant.json
+    python pomodoro_bench.py --compare avant.json
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+if "POMODORO_DATA_DIR" not in os.environ:
+    # Répertoire jetable (base, socket, sons), supprimé en fin de mesure.
+    os.environ["POMODORO_DATA_DIR"] = tempfile.mkdtemp(prefix="pomodoro-bench-")
+    atexit.register(shutil.rmtree, os.environ["POMODORO_DATA_DIR"], ignore_errors=True)
+
+from PyQt6.QtCore import QEvent, QEventLoop, QObject, QT_VERSION_STR, QTimer
+from PyQt6.QtGui import QImage
+from PyQt6.QtWidgets import QApplication
+
+import pomodoro_pro
+from pomodoro_analytics import Analytics
+from pomodoro_history import HistoryStore
+from pomodoro_core import SessionEngine, TimerScheduler, run_simulation
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Métriques pour lesquelles une valeur plus élevée est meilleure.
+HIGHER_IS_BETTER = {"animation.paints_per_second", "simulation.sessions_per_second", "control.1.requests_per_second",
+                    "control.50.requests_per_second"}
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {}
+    def pick(q):
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+    return {
+        "mean": sum(samples) / len(samples),
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "max": samples[-1]
+    }
+
+
+def warm_up(app, window):
+    # Laisse passer le premier affichage (polices, mise en page) avant de mesurer.
+    window.show()
+    run_loop(app, 0.5)
+
+
+def run_loop(app, seconds):
+    # Boucle locale : QApplication.quit() fermerait aussi les fenêtres.
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+
+
+class PaintCounter(QObject):
+    def __init__(self, widget):
+        super().__init__()
+        self.count = 0
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            self.count += 1
+        return False
+
+
+def bench_paint(frames):
+    widget = pomodoro_pro.CircularProgressWidget()
+    widget.setProgress(200, 1500, "work")
+    widget.progress = 200 / 1500
+    image = QImage(widget.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    widget.render(image)
+    samples = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        widget.render(image)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {f"paint.frame_ms.{k}": v for k, v in summarize(samples).items()}
+
+
+def bench_decorations(frames, count):
+    # Décor de count éléments (moitié oiseaux, moitié fleurs) : déplacement,
+    # balancement et rendu complet de chaque image, sprites déjà en cache.
+    widget = pomodoro_pro.CircularProgressWidget()
+    widget.setDecorationCount(count // 2, count - count // 2)
+    widget.setProgress(200, 1500, "work")
+    widget.progress = 200 / 1500
+    image = QImage(widget.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    bounds = widget.rect()
+    samples = []
+    for i in range(frames + 50):
+        t0 = time.perf_counter()
+        widget.birds.move(bounds)
+        widget.flowers.sway(i * 0.05)
+        widget.render(image)
+        if i >= 50:
+            samples.append((time.perf_counter() - t0) * 1000)
+    return {f"decorations.{count}.frame_ms.{k}": v for k, v in summarize(samples).items()}
+
+
+def bench_animate(frames):
+    widget = pomodoro_pro.CircularProgressWidget()
+    widget.setAnimating(True)
+    samples = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        widget._animate()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {f"animate.call_ms.{k}": v for k, v in summarize(samples).items()}
+
+
+def bench_running_window(app, seconds):
+    window = pomodoro_pro.PomodoroApp()
+    warm_up(app, window)
+    counter = PaintCounter(window.progress_widget)
+    window.startCurrentSession()
+    cpu0 = time.process_time()
+    run_loop(app, seconds)
+    cpu = time.process_time() - cpu0
+    window.resetTimer()
+    window.close()
+    return {
+        "animation.paints_per_second": counter.count / seconds,
+        "cpu.running_s_per_hour": cpu * 3600 / seconds
+    }
+
+
+def bench_idle(app, seconds):
+    window = pomodoro_pro.PomodoroApp()
+    warm_up(app, window)
+    counter = PaintCounter(window.progress_widget)
+    cpu0 = time.process_time()
+    run_loop(app, seconds)
+    cpu = time.process_time() - cpu0
+    window.close()
+    return {
+        "cpu.idle_s_per_hour": cpu * 3600 / seconds,
+        "idle.paints_per_hour": counter.count * 3600 / seconds
+    }
+
+
+def bench_startup(runs):
+    script = (
+        "import json, sys, pomodoro_pro\n"
+        "app = pomodoro_pro.QApplication(sys.argv)\n"
+        "pomodoro_pro.STARTUP.mark('qapplication')\n"
+        "w = pomodoro_pro.PomodoroApp(); w.show()\n"
+        "while not pomodoro_pro.STARTUP.finished: app.processEvents()\n"
+        "print(json.dumps(pomodoro_pro.STARTUP.report()))\n"
+    )
+    walls, totals, phases = [], [], {}
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", script], cwd=HERE, env=os.environ,
+                             capture_output=True, text=True, check=True).stdout
+        walls.append((time.perf_counter() - t0) * 1000)
+        report = json.loads(out.strip().splitlines()[-1])
+        totals.append(report["total_ms"])
+        for name, ms in report["phases_ms"].items():
+            phases.setdefault(name, []).append(ms)
+    results = {f"startup.process_wall_ms.{k}": v for k, v in summarize(walls).items()}
+    results["startup.first_frame_ms.p50"] = summarize(totals)["p50"]
+    for name, samples in phases.items():
+        results[f"startup.phase.{name}_ms.p50"] = summarize(samples)["p50"]
+    return results
+
+
+def bench_timer_drift(app, seconds):
+    # Séance réelle de quelques secondes : retard de chaque tick par rapport
+    # à l'instant idéal, et écart final à l'échéance.
+    engine = SessionEngine({"work_duration": seconds / 60})
+    timer = pomodoro_pro.PomodoroTimer(engine)
+    lateness = []
+    finished = []
+
+    def on_tick(remaining):
+        ideal = start + (seconds - remaining)
+        lateness.append((engine.clock() - ideal) * 1000)
+
+    loop = QEventLoop()
+
+    def on_done(_session_type):
+        finished.append(engine.clock())
+        loop.quit()
+
+    timer.timeChanged.connect(on_tick)
+    timer.sessionCompleted.connect(on_done)
+    engine.start()
+    start = engine.countdown.deadline - seconds
+    QTimer.singleShot(int((seconds + 5) * 1000), loop.quit)
+    loop.exec()
+    engine.reset()
+    results = {f"timer.tick_lateness_ms.{k}": v for k, v in summarize(lateness).items()}
+    results["timer.completion_error_ms"] = (finished[0] - (start + seconds)) * 1000 if finished else None
+    return results
+
+
+def bench_simulated_drift(hours):
+    # Ticks volontairement en retard sur une horloge virtuelle : la fin de
+    # séance doit rester calée sur l'échéance quelle que soit la durée.
+    import random
+    now = [0.0]
+    engine = SessionEngine({"work_duration": hours * 60}, clock=lambda: now[0])
+    completed = []
+    engine.subscribe(lambda event, data: event == "completed" and completed.append(now[0]))
+    engine.start()
+    rng = random.Random(0)
+    while not completed:
+        now[0] = engine.countdown.next_second() + rng.uniform(0, 0.05)
+        engine.advance()
+    return {"timer.simulated_drift_s": completed[0] - hours * 3600}
+
+
+def bench_scheduler(timers, displayed, minutes):
+    # Milliers de décomptes sur une horloge virtuelle, dont quelques-uns
+    # affichés : coût CPU par seconde simulée et nombre de réveils.
+    import random
+    now = [0.0]
+    scheduler = TimerScheduler(clock=lambda: now[0])
+    rng = random.Random(0)
+    auto = {"auto_start_breaks": True, "auto_start_work": True}
+    for i in range(timers):
+        now[0] += rng.uniform(0, 0.01)
+        engine = SessionEngine(dict(auto, work_duration=1 + i % 5, break_duration=1), clock=scheduler.clock)
+        engine.start()
+        scheduler.add(engine, displayed=i < displayed)
+    end = now[0] + minutes * 60
+    wakeups = 0
+    cpu0 = time.process_time()
+    while True:
+        wakeup = scheduler.next_wakeup()
+        if wakeup is None or wakeup > end:
+            break
+        now[0] = wakeup
+        scheduler.advance()
+        wakeups += 1
+    cpu = time.process_time() - cpu0
+    return {
+        f"scheduler.{timers}.cpu_ms_per_simulated_s": cpu * 1000 / (minutes * 60),
+        f"scheduler.{timers}.wakeups_per_simulated_s": wakeups / (minutes * 60)
+    }
+
+
+def bench_control(clients, requests):
+    # Clients concurrents interrogeant "status" sur la socket de contrôle.
+    import asyncio
+    from pomodoro_control import ControlServer, supported
+    if not supported():
+        return {}
+    engine = SessionEngine()
+    server = ControlServer(lambda cmd: getattr(engine, cmd)() or engine.status(),
+                           os.path.join(os.environ["POMODORO_DATA_DIR"], "bench.sock"))
+    server.snapshot = engine.status()
+    server.start_thread()
+    latencies = []
+
+    async def client():
+        reader, writer = await asyncio.open_unix_connection(server.path)
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            writer.write(b'{"cmd":"status"}\n')
+            await reader.readline()
+            latencies.append((time.perf_counter() - t0) * 1000)
+        writer.close()
+
+    async def run():
+        await asyncio.gather(*(client() for _ in range(clients)))
+
+    t0 = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - t0
+    server.stop()
+    results = {f"control.{clients}.status_ms.{k}": v for k, v in summarize(latencies).items()}
+    results[f"control.{clients}.requests_per_second"] = len(latencies) / elapsed
+    return results
+
+
+def bench_analytics(years):
+    # Historique synthétique dense (une séance toutes les 15 à 90 minutes) :
+    # chargement complet, ajout incrémental et calcul des indicateurs.
+    import random
+    store = HistoryStore(":memory:")
+    rng = random.Random(0)
+    now = time.time()
+    t = now - years * 365 * 86400
+    rows = []
+    while t < now:
+        t += rng.uniform(900, 5400)
+        rows.append((rng.choice(("work", "work", "break", "long_break")), 1500, t, int(rng.random() < 0.1)))
+    store.add_many(rows)
+    analytics = Analytics()
+    t0 = time.perf_counter()
+    analytics.refresh(store)
+    load = time.perf_counter() - t0
+    store.add("work", 1500, now)
+    t0 = time.perf_counter()
+    analytics.refresh(store)
+    analytics.summary(pomodoro_pro.DEFAULT_SETTINGS)
+    analytics.rolling_average(7, 90)
+    incremental = time.perf_counter() - t0
+    # Conservation d'un an de détail : consolidation, puis rechargement
+    # depuis les totaux journaliers et les séances restantes.
+    t0 = time.perf_counter()
+    store.roll_up(now - 365 * 86400)
+    roll_up = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    Analytics().refresh(store)
+    reload = time.perf_counter() - t0
+    store.close()
+    return {
+        "analytics.sessions": len(rows),
+        "analytics.full_load_ms": load * 1000,
+        "analytics.incremental_ms": incremental * 1000,
+        "analytics.roll_up_ms": roll_up * 1000,
+        "analytics.load_after_roll_up_ms": reload * 1000
+    }
+
+
+def bench_simulation(days):
+    # Cycles complets sur horloge virtuelle, historique SQLite en mémoire.
+    import io
+    summary = run_simulation({"auto_start_breaks": True, "auto_start_work": True}, days,
+                             skip_rate=0.1, out=io.StringIO())
+    return {
+        "simulation.ms_per_simulated_day": summary["elapsed_ms"] / days,
+        "simulation.sessions_per_second": summary["stored"] / (summary["elapsed_ms"] / 1000)
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current, baseline, threshold):
+    regressions = []
+    print(f"{'métrique':45} {'référence':>12} {'actuel':>12} {'écart':>9}")
+    for name in sorted(current):
+        new, old = current[name], baseline.get(name)
+        if new is None or old is None:
+            continue
+        delta = (new - old) / old * 100 if old else 0.0
+        worse = -delta if name in HIGHER_IS_BETTER else delta
+        flag = " !" if worse > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:45} {old:12.3f} {new:12.3f} {delta:+8.1f}%{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="mesures courtes (quelques secondes)")
+    parser.add_argument("--output", help="fichier JSON de résultats")
+    parser.add_argument("--compare", help="rapport JSON de référence")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="régression tolérée en %% avant échec (défaut : 10)")
+    args = parser.parse_args(argv)
+    frames = 200 if args.quick else 2000
+    loop_s = 2 if args.quick else 10
+    app = QApplication(sys.argv[:1])
+    results = {}
+    results.update(bench_paint(frames))
+    results.update(bench_animate(frames))
+    for count in (7, 300):
+        results.update(bench_decorations(frames, count))
+    results.update(bench_idle(app, loop_s))
+    results.update(bench_running_window(app, loop_s))
+    results.update(bench_timer_drift(app, 3 if args.quick else 15))
+    results.update(bench_simulated_drift(24 if args.quick else 24 * 30))
+    for timers in (1000, 10000):
+        results.update(bench_scheduler(timers, 100, 2 if args.quick else 10))
+    results.update(bench_analytics(4))
+    results.update(bench_simulation(30 if args.quick else 365))
+    for clients in (1, 50):
+        results.update(bench_control(clients, 20 if args.quick else 200))
+    results.update(bench_startup(3 if args.quick else 10))
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "platform": platform.platform(),
+            "qpa": os.environ.get("QT_QPA_PLATFORM"),
+            "quick": args.quick
+        },
+        "results": results
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            return 1
+    elif not args.output:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
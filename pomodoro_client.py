@@ -0,0 +1,119 @@
+"""Client léger de l'interface de contrôle de Pomodoro Pro Ultra.
+
+N'importe ni asyncio ni Qt : un second lancement de l'application transmet
+son action à l'instance déjà ouverte et se termine en quelques
+millisecondes. Le serveur est dans pomodoro_control.py.
+"""
+import json
+import os
+import socket
+import sys
+
+from pomodoro_core import user_data_dir
+
+COMMANDS = ("start", "pause", "resume", "toggle", "skip", "reset")
+# Actions acceptées par l'interface graphique : "show" ramène sa fenêtre.
+# Le démon sans interface y répond aussi, avec "headless": true.
+GUI_ACTIONS = ("show",) + COMMANDS
+
+
+def socket_path():
+    """Chemin de la socket (surchargeable par POMODORO_CONTROL_SOCKET)."""
+    override = os.environ.get("POMODORO_CONTROL_SOCKET")
+    if override:
+        return override
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and not os.environ.get("POMODORO_DATA_DIR"):
+        return os.path.join(runtime, "pomodoro-pro.sock")
+    return os.path.join(user_data_dir(), "control.sock")
+
+
+def supported():
+    return hasattr(socket, "AF_UNIX")
+
+
+def is_listening(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def held(path=None):
+    """Vrai si une autre instance (interface ou démon) écoute déjà sur la socket."""
+    return supported() and is_listening(path or socket_path())
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+def request(cmd, path=None, timeout=2.0):
+    """Envoie une commande et renvoie la réponse décodée (client synchrone)."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path or socket_path())
+        sock.sendall(encode({"id": 1, "cmd": cmd}))
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def subscribe(path=None, out=None):
+    out = out or sys.stdout
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path or socket_path())
+        sock.sendall(encode({"cmd": "subscribe"}))
+        with sock.makefile("r", encoding="utf-8") as f:
+            for line in f:
+                out.write(line)
+                out.flush()
+
+
+# ------- INSTANCE UNIQUE ---------
+def cli_action(argv):
+    """Action demandée sur la ligne de commande de l'interface, ou None."""
+    return argv[1] if len(argv) > 1 and argv[1] in GUI_ACTIONS else None
+
+
+def forward(action, path=None, timeout=2.0):
+    """Réponse de l'instance déjà lancée à action, ou None si aucune n'écoute."""
+    try:
+        return request(action, path, timeout)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+
+
+def shown(reply):
+    """Vrai si reply confirme qu'une interface graphique a repris la main."""
+    return bool(reply and reply.get("ok") and not (reply.get("result") or {}).get("headless"))
+
+
+def hand_over(argv):
+    """Transmet l'action de argv à une instance déjà lancée.
+
+    Renvoie le code de sortie du lancement courant, ou None s'il doit
+    lui-même ouvrir l'interface (aucune instance, contrôle désactivé par
+    POMODORO_CONTROL=0, ou socket tenue par un démon sans interface).
+    """
+    if os.environ.get("POMODORO_CONTROL") == "0" or not supported():
+        return None
+    action = cli_action(argv) or "show"
+    try:
+        reply = forward(action)
+    except (OSError, ValueError) as e:
+        print(f"Pomodoro Pro Ultra ne répond pas : {e}", file=sys.stderr)
+        return 1
+    if reply is None:
+        return None
+    if action == "show" and not shown(reply):
+        print("Socket de contrôle tenue par un démon sans interface : "
+              "l'interface s'ouvre sans contrôle.", file=sys.stderr)
+        return None
+    if not reply.get("ok"):
+        print(f"Pomodoro Pro Ultra : {reply.get('error')}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,316 @@
+"""Interface de contrôle locale de Pomodoro Pro Ultra.
+
+Serveur asyncio sur une socket Unix, en JSON ligne par ligne :
+
+    → {"id": 1, "cmd": "status"}
+    ← {"id": 1, "ok": true, "result": {"state": "running", "remaining": 1432, ...}}
+
+Commandes : status, start, pause, resume, toggle, skip, reset et subscribe,
+plus show pour l'interface graphique (le démon y répond "headless": true).
+Après "subscribe", le client reçoit aussi en flux les évènements du moteur
+("started", "paused", "resumed", "reset", "completed") et un "tick" à chaque
+seconde affichée. "status" est servi depuis un instantané tenu à jour par
+publication : il ne touche jamais le moteur. Seul "remaining" est recalculé
+à la réponse, depuis l'échéance publiée (l'interface réduite ne publie
+qu'à chaque pas de progression, soit toutes les durée / 60 secondes).
+
+    python pomodoro_control.py serve --work 25 --auto   # démon pilotable
+    python pomodoro_control.py status                   # client
+    python pomodoro_control.py subscribe
+
+Le client, sans asyncio, est dans pomodoro_client.py.
+"""
+import asyncio
+import errno
+import json
+import math
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import Future
+
+from pomodoro_client import COMMANDS, GUI_ACTIONS, encode, is_listening, request, socket_path, subscribe, supported
+from pomodoro_core import DEFAULT_SETTINGS, SessionEngine, SessionJournal, monotonic, resume_or_start
+
+# Lignes en attente au-delà desquelles un abonné trop lent perd les plus anciennes.
+SUBSCRIBER_QUEUE = 256
+
+
+class ControlServer:
+    """Serveur de contrôle ; dispatch(cmd) exécute une commande du moteur.
+
+    dispatch renvoie le nouvel état (engine.status()) ou un
+    concurrent.futures.Future de cet état quand la commande doit être
+    exécutée dans un autre thread (interface Qt). commands liste les
+    commandes acceptées. publish() peut être appelée depuis n'importe quel
+    thread ; deadline est l'échéance du décompte sur clock, ou None.
+    """
+
+    def __init__(self, dispatch, path=None, commands=COMMANDS, clock=monotonic):
+        self.dispatch = dispatch
+        self.commands = commands
+        self.path = path or socket_path()
+        self.clock = clock
+        self.snapshot = {}
+        self.deadline = None
+        self.loop = None
+        self._server = None
+        self._subscribers = set()
+        self._clients = set()
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    # --- publication ---
+    def publish(self, event, data, status, deadline=None):
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            self.snapshot, self.deadline = status, deadline
+            return
+        loop.call_soon_threadsafe(self._publish, event, data, status, deadline)
+
+    def _publish(self, event, data, status, deadline=None):
+        self.snapshot, self.deadline = status, deadline
+        if not self._subscribers:
+            return
+        line = encode({"event": event, **data})
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(line)
+
+    # --- cycle de vie ---
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        if os.path.exists(self.path):
+            if is_listening(self.path):
+                raise OSError(errno.EADDRINUSE, f"socket déjà utilisée : {self.path}")
+            os.unlink(self.path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        finally:
+            os.umask(umask)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            for task in list(self._clients):
+                task.cancel()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def status(self):
+        status = self.snapshot
+        if self.deadline is not None and status.get("state") == "running":
+            status = {**status, "remaining": max(0, math.ceil(self.deadline - self.clock()))}
+        return status
+
+    def start_thread(self):
+        """Démarre le serveur dans un thread dédié ; lève OSError en cas d'échec."""
+        self._thread = threading.Thread(target=self._run, name="pomodoro-control", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.start())
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            loop.close()
+            return
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(self.close())
+            loop.close()
+
+    def stop(self):
+        if self._thread is not None and self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(1.0)
+        self._thread = None
+
+    # --- clients ---
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._clients.add(task)
+        queue = pump = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply, subscribe = await self._execute(line)
+                writer.write(reply)
+                if subscribe and queue is None:
+                    queue = asyncio.Queue(SUBSCRIBER_QUEUE)
+                    self._subscribers.add(queue)
+                    pump = asyncio.create_task(self._pump(queue, writer))
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(task)
+            if queue is not None:
+                self._subscribers.discard(queue)
+                pump.cancel()
+            writer.close()
+
+    @staticmethod
+    async def _pump(queue, writer):
+        try:
+            while True:
+                writer.write(await queue.get())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    async def _execute(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError
+        except ValueError:
+            return encode({"ok": False, "error": "requête JSON invalide"}), False
+        reply = {"id": request["id"]} if "id" in request else {}
+        cmd = request.get("cmd")
+        if cmd in ("status", "subscribe"):
+            reply.update(ok=True, result=self.status())
+            return encode(reply), cmd == "subscribe"
+        if cmd not in self.commands:
+            reply.update(ok=False, error=f"commande inconnue : {cmd!r}")
+            return encode(reply), False
+        try:
+            result = self.dispatch(cmd)
+            if isinstance(result, Future):
+                result = await asyncio.wrap_future(result)
+        except Exception as e:
+            reply.update(ok=False, error=str(e))
+        else:
+            self.snapshot = result
+            reply.update(ok=True, result=result)
+        return encode(reply), False
+
+
+# ------- DEMON PILOTABLE ---------
+async def serve(engine, path=None, start=False):
+    """Pilote le moteur dans la boucle asyncio et le rend pilotable par socket.
+
+    L'état journalisé est repris une fois la socket obtenue ; start démarre
+    ensuite une séance si aucune n'était en cours.
+    """
+    wake = asyncio.Event()
+
+    def dispatch(cmd):
+        if cmd == "show":
+            # Pas de fenêtre à ramener : le client ouvre sa propre interface.
+            return {**engine.status(), "headless": True}
+        getattr(engine, cmd)()
+        return engine.status()
+
+    server = ControlServer(dispatch, path, commands=GUI_ACTIONS)
+
+    def on_event(event, data):
+        server._publish(event, data, engine.status(), engine.countdown.deadline)
+        wake.set()
+
+    engine.subscribe(on_event)
+    server.publish("status", {}, engine.status(), engine.countdown.deadline)
+    await server.start()
+    journal = SessionJournal()
+    if start:
+        resume_or_start(engine, journal)
+    else:
+        journal.attach(engine)
+    loop = asyncio.get_running_loop()
+    if hasattr(signal, "SIGTERM"):
+        loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    shown = engine.remaining_seconds()
+    try:
+        while True:
+            candidates = [t for t in (engine.countdown.next_second(), engine.auto_start_at) if t is not None]
+            timeout = max(0.0, min(candidates) - engine.clock()) if candidates else None
+            try:
+                await asyncio.wait_for(wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+            engine.advance()
+            remaining = engine.remaining_seconds()
+            if engine.is_running and remaining != shown:
+                server._publish("tick", {"remaining": remaining, "session_type": engine.current_session},
+                                engine.status(), engine.countdown.deadline)
+            shown = remaining
+    finally:
+        journal.detach()
+        engine.unsubscribe(on_event)
+        await server.close()
+
+
+def run_server(engine, path=None, start=False):
+    try:
+        asyncio.run(serve(engine, path, start))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    except OSError as e:
+        print(f"Interface de contrôle indisponible : {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Contrôle de Pomodoro Pro Ultra par socket Unix")
+    parser.add_argument("--socket", help="chemin de la socket (défaut : %(default)s)", default=None)
+    sub = parser.add_subparsers(dest="action", required=True)
+    daemon = sub.add_parser("serve", help="démon pilotable sans interface")
+    daemon.add_argument("--work", type=int, default=DEFAULT_SETTINGS["work_duration"])
+    daemon.add_argument("--break", dest="short_break", type=int, default=DEFAULT_SETTINGS["break_duration"])
+    daemon.add_argument("--long-break", type=int, default=DEFAULT_SETTINGS["long_break_duration"])
+    daemon.add_argument("--sessions", type=int, default=DEFAULT_SETTINGS["sessions_until_long_break"])
+    daemon.add_argument("--auto", action="store_true", help="enchaîner automatiquement les séances")
+    for cmd in ("status",) + GUI_ACTIONS:
+        sub.add_parser(cmd)
+    sub.add_parser("subscribe", help="affiche les évènements en continu")
+    args = parser.parse_args(argv)
+    if not supported():
+        print("Sockets Unix non disponibles sur cette plateforme.", file=sys.stderr)
+        return 1
+    if args.action == "serve":
+        engine = SessionEngine({
+            "work_duration": args.work,
+            "break_duration": args.short_break,
+            "long_break_duration": args.long_break,
+            "sessions_until_long_break": args.sessions,
+            "auto_start_breaks": args.auto,
+            "auto_start_work": args.auto
+        })
+        return run_server(engine, args.socket)
+    try:
+        if args.action == "subscribe":
+            subscribe(args.socket)
+            return 0
+        reply = request(args.action, args.socket)
+    except KeyboardInterrupt:
+        return 0
+    except OSError as e:
+        print(f"Pomodoro Pro Ultra injoignable : {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(reply.get("result") if reply.get("ok") else reply, ensure_ascii=False))
+    return 0 if reply.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,934 @@
+"""Cœur headless de Pomodoro Pro Ultra.
+
+Ce module n'importe que la bibliothèque standard : il contient le cycle
+travail → pause → pause longue, le décompte basé sur une échéance et une
+boucle de démon minimale. L'interface PyQt6 (pomodoro_pro.py) n'en est
+qu'un client.
+"""
+import heapq
+import itertools
+import json
+import os
+import sys
+import time
+
+APP_NAME = "pomodoro-pro"
+
+SESSION_TYPES = ("work", "break", "long_break")
+
+DEFAULT_SETTINGS = {
+    "work_duration": 25,
+    "break_duration": 5,
+    "long_break_duration": 15,
+    "sessions_until_long_break": 4,
+    "auto_start_breaks": False,
+    "auto_start_work": False,
+    "theme": "modern",
+    "notifications": True,
+    "sound_enabled": True,
+    "mode_zen": False,
+    "minimize_to_tray": True,
+    # Mois de séances gardées en détail ; au-delà, totaux journaliers (0 : tout garder).
+    "retention_months": 0
+}
+
+# Délai (secondes) avant le démarrage automatique de la séance suivante.
+AUTO_START_DELAY = 2.0
+
+# Horloge monotone qui continue d'avancer pendant une mise en veille quand le
+# système le permet (CLOCK_BOOTTIME sous Linux), sinon time.monotonic().
+if hasattr(time, "CLOCK_BOOTTIME"):
+    def monotonic():
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+else:
+    monotonic = time.monotonic
+
+
+def user_data_dir():
+    """Répertoire de données par utilisateur (surchargeable par POMODORO_DATA_DIR)."""
+    override = os.environ.get("POMODORO_DATA_DIR")
+    if override:
+        return override
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.join(home, "AppData", "Roaming")
+    elif sys.platform == "darwin":
+        base = os.path.join(home, "Library", "Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+    return os.path.join(base, APP_NAME)
+
+
+def user_config_dir():
+    """Répertoire de configuration par utilisateur.
+
+    POMODORO_CONFIG_DIR a la priorité ; sinon POMODORO_DATA_DIR, s'il est
+    défini, regroupe configuration et données au même endroit.
+    """
+    override = os.environ.get("POMODORO_CONFIG_DIR") or os.environ.get("POMODORO_DATA_DIR")
+    if override:
+        return override
+    home = os.path.expanduser("~")
+    if sys.platform in ("win32", "darwin"):
+        return user_data_dir()
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(home, ".config")
+    return os.path.join(base, APP_NAME)
+
+
+# ------- PARAMETRES ---------
+SETTINGS_VERSION = 1
+
+# Ancien emplacement, relatif au répertoire courant, migré au premier chargement.
+LEGACY_SETTINGS_FILE = "pomodoro_settings.json"
+
+# Bornes des réglages numériques (identiques à celles des QSpinBox).
+SETTINGS_RANGES = {
+    "work_duration": (1, 120),
+    "break_duration": (1, 60),
+    "long_break_duration": (1, 120),
+    "sessions_until_long_break": (2, 10),
+    "retention_months": (0, 120)
+}
+
+
+def validate_settings(raw):
+    """Réglages complets et valides : les clés inconnues sont ignorées, les
+    valeurs absentes ou invalides remplacées par leur valeur par défaut."""
+    settings = dict(DEFAULT_SETTINGS)
+    if not isinstance(raw, dict):
+        return settings
+    for key, default in DEFAULT_SETTINGS.items():
+        value = raw.get(key)
+        if key in SETTINGS_RANGES:
+            low, high = SETTINGS_RANGES[key]
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                settings[key] = min(high, max(low, int(value)))
+        elif isinstance(default, bool):
+            if isinstance(value, bool):
+                settings[key] = value
+        elif isinstance(value, str) and value:
+            settings[key] = value
+    return settings
+
+
+def diff_settings(old, new):
+    """Sous-ensemble de new dont la valeur diffère de old."""
+    return {key: value for key, value in new.items() if old.get(key) != value}
+
+
+class SettingsStore:
+    """Fichier de réglages versionné, écrit de façon atomique.
+
+    Format : {"version": SETTINGS_VERSION, "settings": {...}}. Les anciens
+    fichiers à plat (version 0) sont migrés au chargement.
+    """
+
+    FILENAME = "settings.json"
+
+    def __init__(self, path=None, legacy_path=LEGACY_SETTINGS_FILE):
+        self.path = path or os.path.join(user_config_dir(), self.FILENAME)
+        self.legacy_path = legacy_path
+
+    def load(self):
+        data = self._read(self.path)
+        if data is None and self.legacy_path:
+            data = self._read(self.legacy_path)
+            if data is not None:
+                settings = validate_settings(self._migrate(data))
+                self.save(settings)
+                return settings
+        return validate_settings(self._migrate(data))
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Réglages illisibles ({path}) : {e}", file=sys.stderr)
+            return None
+
+    @staticmethod
+    def _migrate(data):
+        if not isinstance(data, dict):
+            return {}
+        if "version" not in data:
+            # Version 0 : dictionnaire des réglages à plat.
+            return data
+        return data.get("settings") or {}
+
+    def save(self, settings):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        payload = {"version": SETTINGS_VERSION, "settings": validate_settings(settings)}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+# ------- INSTRUMENTATION DU DEMARRAGE ---------
+class StartupProfiler:
+    """Découpe le temps de démarrage en phases nommées (millisecondes).
+
+    Avec POMODORO_PROFILE_STARTUP=1 le détail est affiché sur stderr ; avec
+    POMODORO_STARTUP_BUDGET_MS, un dépassement du budget est signalé.
+    """
+
+    def __init__(self, start=None, clock=time.perf_counter):
+        self.clock = clock
+        self.start = start if start is not None else clock()
+        self._last = self.start
+        self.phases = []
+        self.finished = False
+
+    def mark(self, name):
+        now = self.clock()
+        self.phases.append((name, (now - self._last) * 1000))
+        self._last = now
+
+    def total_ms(self):
+        return (self._last - self.start) * 1000
+
+    def budget_ms(self):
+        budget = os.environ.get("POMODORO_STARTUP_BUDGET_MS")
+        return float(budget) if budget else None
+
+    def report(self):
+        budget = self.budget_ms()
+        return {
+            "phases_ms": dict(self.phases),
+            "total_ms": self.total_ms(),
+            "budget_ms": budget,
+            "over_budget": budget is not None and self.total_ms() > budget
+        }
+
+    def finish(self, name="first_paint", out=None):
+        if self.finished:
+            return
+        self.mark(name)
+        self.finished = True
+        out = out or sys.stderr
+        report = self.report()
+        if os.environ.get("POMODORO_PROFILE_STARTUP"):
+            details = ", ".join(f"{phase} {ms:.1f} ms" for phase, ms in self.phases)
+            print(f"Démarrage : {report['total_ms']:.1f} ms ({details})", file=out)
+        if report["over_budget"]:
+            print(f"Budget de démarrage dépassé : {report['total_ms']:.1f} ms > {report['budget_ms']:.0f} ms", file=out)
+
+
+# ------- DECOMPTE ---------
+class Countdown:
+    """Décompte défini par une échéance absolue sur une horloge injectable."""
+
+    def __init__(self, clock=monotonic):
+        self.clock = clock
+        self.deadline = None
+        self.duration = 0
+        self._remaining = 0.0
+        self.paused = False
+
+    @property
+    def active(self):
+        return self.deadline is not None or self.paused
+
+    def start(self, duration):
+        self.duration = duration
+        self._remaining = float(duration)
+        self.paused = False
+        self.deadline = self.clock() + duration
+
+    def remaining(self):
+        if self.deadline is None:
+            return self._remaining
+        return max(0.0, self.deadline - self.clock())
+
+    def remaining_seconds(self):
+        remaining = self.remaining()
+        seconds = int(remaining)
+        return seconds + 1 if remaining > seconds else seconds
+
+    def expired(self):
+        return self.deadline is not None and self.clock() >= self.deadline
+
+    def next_second(self):
+        # Instant du prochain changement de seconde affichée.
+        return self.next_step(1.0)
+
+    def next_step(self, step):
+        # Instant où le temps restant franchit le prochain multiple de step
+        # secondes, ou l'échéance si elle vient avant.
+        if self.deadline is None:
+            return None
+        now = self.clock()
+        remaining = self.deadline - now
+        if remaining <= 0:
+            return now
+        delta = remaining % step or step
+        return now + min(delta, remaining)
+
+    def pause(self):
+        if self.deadline is None:
+            return False
+        self._remaining = self.remaining()
+        self.deadline = None
+        self.paused = True
+        return True
+
+    def resume(self):
+        if not self.paused:
+            return False
+        self.paused = False
+        self.deadline = self.clock() + self._remaining
+        return True
+
+    def reset(self):
+        self.deadline = None
+        self._remaining = 0.0
+        self.paused = False
+
+
+# ------- MOTEUR DE SEANCES ---------
+class SessionEngine:
+    """Machine à états des séances, pilotée par advance() et next_wakeup().
+
+    Les observateurs enregistrés par subscribe() reçoivent (event, data) pour
+    les évènements "started", "paused", "resumed", "reset", "completed" et
+    "restored" (après restore()).
+    """
+
+    def __init__(self, settings=None, clock=monotonic, wall_clock=time.time):
+        self.settings = dict(DEFAULT_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.countdown = Countdown(clock)
+        self.current_session = "work"
+        self.session_count = 0
+        self.auto_start_at = None
+        self._listeners = []
+
+    # --- observateurs ---
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _emit(self, event, **data):
+        for callback in list(self._listeners):
+            callback(event, data)
+
+    # --- état ---
+    @property
+    def is_running(self):
+        return self.countdown.deadline is not None
+
+    @property
+    def is_paused(self):
+        return self.countdown.paused
+
+    def update_settings(self, settings):
+        self.settings.update(settings)
+
+    def session_duration(self, session_type):
+        s = self.settings
+        durations = {
+            "work": s["work_duration"],
+            "break": s["break_duration"],
+            "long_break": s["long_break_duration"]
+        }
+        return durations.get(session_type, 25)
+
+    def remaining_seconds(self):
+        if self.countdown.active:
+            return self.countdown.remaining_seconds()
+        return self.session_duration(self.current_session) * 60
+
+    def total_seconds(self):
+        if self.countdown.active:
+            return self.countdown.duration
+        return self.session_duration(self.current_session) * 60
+
+    def status(self):
+        if self.is_running:
+            state = "running"
+        elif self.is_paused:
+            state = "paused"
+        else:
+            state = "idle"
+        return {
+            "state": state,
+            "session_type": self.current_session,
+            "remaining": self.remaining_seconds(),
+            "total": self.total_seconds(),
+            "session_count": self.session_count
+        }
+
+    # --- transitions ---
+    def start(self):
+        self.auto_start_at = None
+        duration = self.session_duration(self.current_session) * 60
+        self.countdown.start(duration)
+        self._emit("started", session_type=self.current_session, duration=duration)
+
+    def pause(self):
+        if self.countdown.pause():
+            self._emit("paused", session_type=self.current_session,
+                       remaining=self.countdown.remaining_seconds())
+
+    def resume(self):
+        if self.countdown.resume():
+            self._emit("resumed", session_type=self.current_session,
+                       remaining=self.countdown.remaining_seconds())
+
+    def toggle(self):
+        if self.is_running:
+            self.pause()
+        elif self.is_paused:
+            self.resume()
+        else:
+            self.start()
+
+    def reset(self):
+        self.countdown.reset()
+        self.auto_start_at = None
+        self._emit("reset", session_type=self.current_session)
+
+    def skip(self):
+        self.countdown.reset()
+        self.complete(self.current_session, skipped=True)
+
+    def complete(self, session_type, skipped=False):
+        self.countdown.reset()
+        duration = self.session_duration(session_type) * 60
+        completed_at = self.wall_clock()
+        if session_type == "work":
+            self.session_count += 1
+            if self.session_count % self.settings["sessions_until_long_break"] == 0:
+                self.current_session = "long_break"
+            else:
+                self.current_session = "break"
+        else:
+            self.current_session = "work"
+        if self.should_auto_start():
+            self.auto_start_at = self.clock() + AUTO_START_DELAY
+        else:
+            self.auto_start_at = None
+        self._emit("completed", session_type=session_type, duration=duration,
+                   completed_at=completed_at, next_session=self.current_session,
+                   auto_start=self.auto_start_at is not None, skipped=skipped)
+
+    def should_auto_start(self):
+        s = self.settings
+        return (
+            (self.current_session == "work" and s["auto_start_work"]) or
+            (self.current_session in ["break", "long_break"] and s["auto_start_breaks"])
+        )
+
+    # --- persistance ---
+    def snapshot(self):
+        """État complet, échéances converties en heure murale (survit au redémarrage)."""
+        now, wall = self.clock(), self.wall_clock()
+        countdown = self.countdown
+        return {
+            "session_type": self.current_session,
+            "session_count": self.session_count,
+            "duration": countdown.duration,
+            "deadline": wall + countdown.deadline - now if countdown.deadline is not None else None,
+            "paused": countdown.paused,
+            "remaining": countdown._remaining if countdown.paused else None,
+            "auto_start_at": wall + self.auto_start_at - now if self.auto_start_at is not None else None
+        }
+
+    def restore(self, state):
+        # Une échéance dépassée pendant l'arrêt est traitée au prochain advance().
+        now, wall = self.clock(), self.wall_clock()
+        countdown = self.countdown
+        countdown.reset()
+        self.current_session = state["session_type"]
+        self.session_count = state["session_count"]
+        countdown.duration = state["duration"]
+        if state["deadline"] is not None:
+            countdown.deadline = now + state["deadline"] - wall
+        elif state["paused"]:
+            countdown.paused = True
+            countdown._remaining = state["remaining"]
+        self.auto_start_at = now + state["auto_start_at"] - wall if state["auto_start_at"] is not None else None
+        self._emit("restored", **self.status())
+
+    # --- planification ---
+    def next_wakeup(self):
+        wakeups = [t for t in (self.countdown.deadline, self.auto_start_at) if t is not None]
+        return min(wakeups) if wakeups else None
+
+    def advance(self):
+        if self.countdown.expired():
+            self.complete(self.current_session)
+        if self.auto_start_at is not None and self.clock() >= self.auto_start_at:
+            self.start()
+
+
+# ------- JOURNAL DE SEANCE ---------
+# Champs de SessionEngine.snapshot() portés par chaque transition, et valeurs
+# que la transition impose au reste de l'état.
+TRANSITIONS = {
+    "started": (("session_type", "duration", "deadline"),
+                {"paused": False, "remaining": None, "auto_start_at": None}),
+    "paused": (("remaining",), {"paused": True, "deadline": None}),
+    "resumed": (("deadline",), {"paused": False, "remaining": None}),
+    "reset": ((), {"paused": False, "deadline": None, "remaining": None, "auto_start_at": None}),
+    "completed": (("session_type", "session_count", "auto_start_at"),
+                  {"paused": False, "deadline": None, "remaining": None})
+}
+
+
+class SessionJournal:
+    """Reprise après un arrêt brutal : instantané + journal des transitions.
+
+    Chaque transition du moteur est ajoutée (et synchronisée) au journal ;
+    toutes les compact_every entrées, l'état courant est réécrit dans
+    l'instantané et le journal vidé. Une reprise relit donc au plus
+    compact_every lignes, quelle que soit la durée de fonctionnement.
+    """
+
+    SNAPSHOT = "session.snapshot.json"
+    JOURNAL = "session.journal"
+
+    def __init__(self, directory=None, compact_every=64):
+        directory = directory or user_data_dir()
+        self.snapshot_path = os.path.join(directory, self.SNAPSHOT)
+        self.journal_path = os.path.join(directory, self.JOURNAL)
+        self.compact_every = compact_every
+        self.engine = None
+        self.seq = 0
+        self._entries = 0
+        self._file = None
+
+    def load(self):
+        """Dernier état connu (dict de snapshot()) ou None."""
+        state, self.seq = None, 0
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            state, self.seq = data["state"], data["seq"]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Instantané de séance illisible : {e}", file=sys.stderr)
+        self._entries = 0
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        fields, implied = TRANSITIONS[record["t"]]
+                        seq = record["seq"]
+                    except (ValueError, KeyError, TypeError):
+                        break  # dernière ligne tronquée par l'arrêt
+                    if seq <= self.seq:
+                        continue  # déjà dans l'instantané
+                    state = dict(state or self._initial_state())
+                    state.update(implied)
+                    state.update({key: record[key] for key in fields})
+                    self.seq = seq
+                    self._entries += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Journal de séance illisible : {e}", file=sys.stderr)
+        return state
+
+    @staticmethod
+    def _initial_state():
+        return SessionEngine().snapshot()
+
+    def attach(self, engine):
+        """Restaure le moteur depuis le disque, puis journalise ses transitions."""
+        self.engine = engine
+        state = self.load()
+        if state is not None:
+            engine.restore(state)
+        engine.subscribe(self._onEngineEvent)
+
+    def detach(self):
+        if self.engine is not None:
+            self.engine.unsubscribe(self._onEngineEvent)
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _onEngineEvent(self, event, data):
+        if event not in TRANSITIONS:
+            return
+        state = self.engine.snapshot()
+        self.seq += 1
+        record = {"seq": self.seq, "t": event}
+        record.update({key: state[key] for key in TRANSITIONS[event][0]})
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+                self._file = open(self.journal_path, "a", encoding="utf-8")
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._entries += 1
+            if self._entries >= self.compact_every:
+                self.compact(state)
+        except OSError as e:
+            print(f"Erreur d'écriture du journal de séance : {e}", file=sys.stderr)
+
+    def compact(self, state=None):
+        state = state or self.engine.snapshot()
+        tmp = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "seq": self.seq, "state": state}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # Un arrêt ici laisse des entrées déjà couvertes par l'instantané :
+        # load() les ignore grâce à leur numéro de séquence.
+        self.close()
+        self._file = open(self.journal_path, "w", encoding="utf-8")
+        self._entries = 0
+
+
+# ------- ORDONNANCEUR MULTI-DECOMPTES ---------
+class TimerScheduler:
+    """Plusieurs SessionEngine pilotés par un seul tas d'échéances.
+
+    Chaque décompte n'a qu'une entrée valide dans le tas : un changement
+    d'état en pousse une nouvelle et l'ancienne est ignorée quand elle
+    remonte (annulation paresseuse). Les décomptes affichés se réveillent à
+    chaque changement de seconde, les autres seulement à leur échéance.
+    advance() traite d'un coup toutes les entrées échues et émet un seul
+    évènement "ticks" {clé: secondes restantes} pour les décomptes affichés ;
+    "wakeup" signale qu'un réveil plus proche a été programmé.
+    """
+
+    def __init__(self, clock=monotonic):
+        self.clock = clock
+        self._engines = {}
+        self._callbacks = {}
+        self._displayed = set()
+        self._due = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._keys = itertools.count(1)
+        self._advancing = False
+        self._listeners = []
+
+    def __len__(self):
+        return len(self._engines)
+
+    def __contains__(self, key):
+        return key in self._engines
+
+    # --- observateurs ---
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _emit(self, event, **data):
+        for callback in list(self._listeners):
+            callback(event, data)
+
+    # --- décomptes ---
+    def add(self, engine=None, displayed=False, key=None):
+        if engine is None:
+            engine = SessionEngine(clock=self.clock)
+        if key is None:
+            key = next(self._keys)
+        if key in self._engines:
+            raise KeyError(f"décompte déjà enregistré : {key!r}")
+        self._engines[key] = engine
+        self._callbacks[key] = engine.subscribe(lambda event, data: self._reschedule(key))
+        if displayed:
+            self._displayed.add(key)
+        self._reschedule(key)
+        return key
+
+    def remove(self, key):
+        engine = self._engines.pop(key)
+        engine.unsubscribe(self._callbacks.pop(key))
+        self._displayed.discard(key)
+        self._due.pop(key, None)
+        return engine
+
+    def engine(self, key):
+        return self._engines[key]
+
+    def set_displayed(self, key, displayed):
+        if displayed:
+            self._displayed.add(key)
+        else:
+            self._displayed.discard(key)
+        self._reschedule(key)
+
+    def active_count(self):
+        return len(self._due)
+
+    # --- planification ---
+    def _wakeup(self, key):
+        engine = self._engines[key]
+        if key not in self._displayed:
+            return engine.next_wakeup()
+        wakeups = [t for t in (engine.countdown.next_second(), engine.auto_start_at) if t is not None]
+        return min(wakeups) if wakeups else None
+
+    def _reschedule(self, key):
+        when = self._wakeup(key)
+        current = self._due.get(key)
+        if when is None:
+            self._due.pop(key, None)
+            return
+        if current is not None and current[0] == when:
+            return
+        entry = (when, next(self._seq), key)
+        self._due[key] = entry[:2]
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._compact()
+        if not self._advancing and self._heap[0] is entry:
+            self._emit("wakeup", at=when)
+
+    def _compact(self):
+        self._heap = [(when, seq, key) for key, (when, seq) in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def _stale(self, entry):
+        return self._due.get(entry[2]) != entry[:2]
+
+    def next_wakeup(self):
+        heap = self._heap
+        while heap and self._stale(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def advance(self, now=None):
+        now = self.clock() if now is None else now
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            if not self._stale(entry):
+                del self._due[entry[2]]
+                due.append(entry[2])
+        ticks = {}
+        self._advancing = True
+        try:
+            for key in due:
+                engine = self._engines[key]
+                engine.advance()
+                if key in self._displayed:
+                    ticks[key] = engine.remaining_seconds()
+                if key not in self._due:
+                    self._reschedule(key)
+        finally:
+            self._advancing = False
+        if ticks:
+            self._emit("ticks", ticks=ticks)
+        return ticks
+
+
+# ------- SIMULATION ---------
+class VirtualClock:
+    """Horloge simulée servant à la fois d'horloge monotone et murale."""
+
+    def __init__(self, start=0.0, wall_start=None):
+        self.now = start
+        self.wall_offset = (time.time() if wall_start is None else wall_start) - start
+
+    def __call__(self):
+        return self.now
+
+    def wall(self):
+        return self.now + self.wall_offset
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+    def advance_to(self, instant):
+        self.now = max(self.now, instant)
+
+
+def simulate(settings=None, days=30, clock=None, start_delay=60.0, skip_rate=0.0, seed=0, listeners=()):
+    """Enchaîne les séances pendant `days` jours sur une horloge virtuelle.
+
+    Sans démarrage automatique, l'utilisateur simulé lance la séance suivante
+    start_delay secondes après la fin de la précédente ; avec skip_rate, une
+    séance est passée à mi-parcours avec cette probabilité (tirage
+    reproductible par seed). Les listeners reçoivent les évènements du
+    moteur comme des observateurs ordinaires. Renvoie le moteur.
+    """
+    import random
+    clock = clock or VirtualClock()
+    engine = SessionEngine(settings, clock=clock, wall_clock=clock.wall)
+    for listener in listeners:
+        engine.subscribe(listener)
+    rng = random.Random(seed)
+    skip_at = None
+
+    def plan_skip(event, data):
+        nonlocal skip_at
+        if event == "started" and rng.random() < skip_rate:
+            skip_at = clock.now + data["duration"] / 2
+        elif event in ("started", "completed"):
+            skip_at = None
+
+    engine.subscribe(plan_skip)
+    end = clock.now + days * 86400
+    engine.start()
+    while clock.now < end:
+        wakeup = engine.next_wakeup()
+        if wakeup is None:
+            clock.sleep(start_delay)
+            engine.start()
+        elif skip_at is not None and skip_at < wakeup:
+            clock.advance_to(skip_at)
+            engine.skip()
+        else:
+            clock.advance_to(wakeup)
+            engine.advance()
+    engine.unsubscribe(plan_skip)
+    return engine
+
+
+def run_simulation(settings, days, history_path=":memory:", skip_rate=0.0, seed=0, out=None):
+    """Simulation écrite dans un HistoryStore et un StatsAggregator ; affiche un
+    résumé JSON dont l'empreinte change si le comportement du cycle change."""
+    import hashlib
+    from pomodoro_history import HistoryStore, StatsAggregator
+    out = out or sys.stdout
+    store = HistoryStore(history_path)
+    stats = StatsAggregator()
+    digest = hashlib.sha1()
+    counts = dict.fromkeys(SESSION_TYPES, 0)
+    # Date de départ fixe : l'empreinte ne dépend pas du jour d'exécution.
+    clock = VirtualClock(wall_start=1704096000.0)
+
+    def record(event, data):
+        if event != "completed":
+            return
+        store.add(data["session_type"], data["duration"], data["completed_at"], data["skipped"])
+        stats.add(data["session_type"], data["duration"], data["completed_at"], data["skipped"])
+        counts[data["session_type"]] += 1
+        digest.update(f"{data['session_type']},{data['duration']},{data['completed_at']:.3f},"
+                      f"{int(data['skipped'])}\n".encode())
+
+    t0 = time.perf_counter()
+    simulate(settings, days, clock=clock, skip_rate=skip_rate, seed=seed, listeners=[record])
+    elapsed = time.perf_counter() - t0
+    summary = {
+        "days": days,
+        "sessions": counts,
+        "stored": store.count(),
+        "work_minutes": stats.total_minutes,
+        "longest_streak": stats.longest_streak,
+        "fingerprint": digest.hexdigest(),
+        "elapsed_ms": round(elapsed * 1000, 1)
+    }
+    store.close()
+    out.write(json.dumps(summary, indent=2) + "\n")
+    return summary
+
+
+# ------- DEMON ---------
+def resume_or_start(engine, journal):
+    """Reprend l'état journalisé ; démarre une séance si aucune n'était en cours."""
+    journal.attach(engine)
+    if not (engine.is_running or engine.is_paused or engine.auto_start_at is not None):
+        engine.start()
+
+
+def run_daemon(engine, sleep=time.sleep, out=None):
+    """Boucle bloquante : dort jusqu'au prochain réveil et journalise les évènements."""
+    out = out or sys.stdout
+
+    def log(event, data):
+        out.write(json.dumps({"event": event, **data}) + "\n")
+        out.flush()
+
+    engine.subscribe(log)
+    try:
+        while True:
+            wakeup = engine.next_wakeup()
+            if wakeup is None:
+                break
+            delay = wakeup - engine.clock()
+            if delay > 0:
+                sleep(delay)
+            engine.advance()
+    finally:
+        engine.unsubscribe(log)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Pomodoro Pro Ultra sans interface graphique")
+    parser.add_argument("--work", type=int, default=DEFAULT_SETTINGS["work_duration"])
+    parser.add_argument("--break", dest="short_break", type=int, default=DEFAULT_SETTINGS["break_duration"])
+    parser.add_argument("--long-break", type=int, default=DEFAULT_SETTINGS["long_break_duration"])
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SETTINGS["sessions_until_long_break"])
+    parser.add_argument("--auto", action="store_true", help="enchaîner automatiquement les séances")
+    parser.add_argument("--control", action="store_true",
+                        help="rendre le démon pilotable par socket Unix (voir pomodoro_control.py)")
+    parser.add_argument("--simulate", type=float, metavar="JOURS",
+                        help="simuler JOURS jours de séances sur une horloge virtuelle et quitter")
+    parser.add_argument("--history", default=":memory:",
+                        help="base d'historique de la simulation (défaut : en mémoire)")
+    parser.add_argument("--skip-rate", type=float, default=0.0,
+                        help="probabilité de passer une séance pendant la simulation")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    settings = {
+        "work_duration": args.work,
+        "break_duration": args.short_break,
+        "long_break_duration": args.long_break,
+        "sessions_until_long_break": args.sessions,
+        "auto_start_breaks": args.auto,
+        "auto_start_work": args.auto
+    }
+    if args.simulate is not None:
+        run_simulation(settings, args.simulate, args.history, args.skip_rate, args.seed)
+        return 0
+    engine = SessionEngine(settings)
+    if args.control:
+        # Le journal n'est repris qu'une fois la socket obtenue : une seconde
+        # instance n'écrit pas dans celui de la première.
+        from pomodoro_control import run_server
+        return run_server(engine, start=True)
+    journal = SessionJournal()
+    resume_or_start(engine, journal)
+    if engine.is_paused:
+        # Sans socket de contrôle, rien d'autre ne pourrait la reprendre.
+        engine.resume()
+    try:
+        run_daemon(engine)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        journal.detach()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,510 @@
+"""Historique persistant des séances (SQLite en mode WAL).
+
+Chaque séance est ajoutée en O(1) ; les index sur la date de fin et le type
+permettent de paginer et d'agréger sans jamais charger tout l'historique.
+Les séances plus anciennes que la durée de conservation sont consolidées en
+totaux journaliers (roll_up) : leur détail disparaît, pas les statistiques.
+"""
+import calendar
+import csv
+import io
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import date
+
+from pomodoro_core import SESSION_TYPES, user_data_dir
+from pomodoro_metrics import timed
+
+HISTORY_FILENAME = "history.sqlite3"
+EXPORT_FIELDS = ("session_type", "duration", "completed_at", "skipped")
+# Bornes des séances importées (secondes) : une journée au plus, et une
+# date de fin au plus un jour dans le futur.
+MAX_DURATION = 86400
+MAX_CLOCK_SKEW = 86400
+
+# Ordinal grégorien du 1er janvier 1970.
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def local_day(completed_at, local):
+    """Ordinal du jour local de completed_at ; local = time.localtime(completed_at)."""
+    return int((completed_at + local.tm_gmtoff) // 86400) + EPOCH_ORDINAL
+
+
+def default_history_path():
+    return os.path.join(user_data_dir(), HISTORY_FILENAME)
+
+
+def retention_cutoff(months, today=None):
+    """Horodatage du début du jour local situé months mois avant today."""
+    today = today or date.today()
+    year, month = divmod(today.year * 12 + today.month - 1 - months, 12)
+    day = min(today.day, calendar.monthrange(year, month + 1)[1])
+    return time.mktime(date(year, month + 1, day).timetuple())
+
+
+class TransferCancelled(Exception):
+    pass
+
+
+class HistoryStore:
+    SCHEMA_VERSION = 4
+
+    def __init__(self, path=None):
+        self.path = path or default_history_path()
+        self._conn = None
+
+    # La connexion n'est ouverte qu'au premier accès.
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = self.connect()
+        return self._conn
+
+    def connect(self):
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate(conn)
+        return conn
+
+    def _migrate(self, conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id INTEGER PRIMARY KEY,
+                    session_type TEXT NOT NULL,
+                    duration INTEGER NOT NULL,
+                    completed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_sessions_completed_at
+                    ON sessions(completed_at);
+                CREATE INDEX IF NOT EXISTS idx_sessions_type_completed_at
+                    ON sessions(session_type, completed_at);
+            """)
+        if version < 2:
+            # Index unique servant au dédoublonnage des imports.
+            conn.executescript("""
+                DELETE FROM sessions WHERE id NOT IN (
+                    SELECT MIN(id) FROM sessions GROUP BY session_type, duration, completed_at
+                );
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_unique
+                    ON sessions(session_type, duration, completed_at);
+            """)
+        if version < 3:
+            # Séances passées avant leur fin (bouton "Passer").
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]
+            if "skipped" not in columns:
+                conn.execute("ALTER TABLE sessions ADD COLUMN skipped INTEGER NOT NULL DEFAULT 0")
+        if version < 4:
+            # Totaux des séances consolidées : par jour local et type, et
+            # séances de travail par (jour de semaine, heure) pour la carte.
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS daily_rollups (
+                    day INTEGER NOT NULL,
+                    session_type TEXT NOT NULL,
+                    completed INTEGER NOT NULL,
+                    completed_minutes INTEGER NOT NULL,
+                    skipped INTEGER NOT NULL,
+                    skipped_minutes INTEGER NOT NULL,
+                    PRIMARY KEY (day, session_type)
+                );
+                CREATE TABLE IF NOT EXISTS heatmap_rollups (
+                    weekday INTEGER NOT NULL,
+                    hour INTEGER NOT NULL,
+                    sessions INTEGER NOT NULL,
+                    PRIMARY KEY (weekday, hour)
+                );
+                CREATE TABLE IF NOT EXISTS history_meta (
+                    key TEXT PRIMARY KEY,
+                    value
+                );
+            """)
+        conn.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+        conn.commit()
+
+    @timed("history.write")
+    def add(self, session_type, duration, completed_at, skipped=False):
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO sessions(session_type, duration, completed_at, skipped) VALUES (?, ?, ?, ?)",
+                (session_type, int(duration), float(completed_at), int(skipped)))
+        return cur.lastrowid
+
+    def count(self, session_type=None):
+        if session_type is None:
+            return self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM sessions WHERE session_type = ?", (session_type,)).fetchone()[0]
+
+    def count_after(self, last_id):
+        return self.conn.execute("SELECT COUNT(*) FROM sessions WHERE id > ?", (last_id,)).fetchone()[0]
+
+    def last_id(self):
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM sessions").fetchone()[0]
+
+    def recent(self, limit, offset=0):
+        # Séances les plus récentes d'abord : (id, type, durée, horodatage, passée).
+        return self.conn.execute(
+            "SELECT id, session_type, duration, completed_at, skipped FROM sessions "
+            "ORDER BY completed_at DESC, id DESC LIMIT ? OFFSET ?",
+            (limit, offset)).fetchall()
+
+    def iter_sessions(self, since=None, chunk_size=1000):
+        # Parcours en flux, par ordre chronologique, à mémoire constante :
+        # (type, durée, horodatage, passée).
+        query = "SELECT session_type, duration, completed_at, skipped FROM sessions"
+        params = ()
+        if since is not None:
+            query += " WHERE completed_at >= ?"
+            params = (since,)
+        cur = self.conn.execute(query + " ORDER BY completed_at, id", params)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+
+    def rows_after(self, last_id, chunk_size=5000):
+        # Séances d'identifiant supérieur à last_id, par lots :
+        # (id, type, durée, horodatage, passée).
+        cur = self.conn.execute(
+            "SELECT id, session_type, duration, completed_at, skipped FROM sessions "
+            "WHERE id > ? ORDER BY id", (last_id,))
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+
+    @timed("history.write_batch")
+    def add_many(self, rows):
+        # Insère un lot de (type, durée, horodatage, passée) ; les doublons sont
+        # ignorés, comme les séances d'une période déjà consolidée. Retourne
+        # (séances ajoutées, séances écartées car antérieures à rolled_until).
+        rows = list(rows)
+        count = len(rows)
+        rolled_until = self.rolled_until()
+        if rolled_until is not None:
+            rows = [row for row in rows if row[2] >= rolled_until]
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO sessions(session_type, duration, completed_at, skipped) "
+                "VALUES (?, ?, ?, ?)",
+                rows)
+        return self.conn.total_changes - before, count - len(rows)
+
+    # --- conservation ---
+    def rolled_until(self):
+        row = self.conn.execute("SELECT value FROM history_meta WHERE key = 'rolled_until'").fetchone()
+        return row[0] if row else None
+
+    @timed("history.roll_up")
+    def roll_up(self, before):
+        """Consolide en totaux journaliers les séances terminées avant before
+        (horodatage) et les supprime ; renvoie le nombre de séances consolidées."""
+        conn = self.conn
+        oldest = conn.execute("SELECT MIN(completed_at) FROM sessions").fetchone()[0]
+        if oldest is None or oldest >= before:
+            return 0
+        days = {}
+        heatmap = {}
+        localtime = time.localtime
+        with conn:
+            cur = conn.execute(
+                "SELECT session_type, duration, completed_at, skipped FROM sessions WHERE completed_at < ?",
+                (before,))
+            for session_type, duration, completed_at, skipped in cur:
+                local = localtime(completed_at)
+                totals = days.setdefault((local_day(completed_at, local), session_type), [0, 0, 0, 0])
+                if skipped:
+                    totals[2] += 1
+                    totals[3] += duration // 60
+                    continue
+                totals[0] += 1
+                totals[1] += duration // 60
+                if session_type == "work":
+                    key = (local.tm_wday, local.tm_hour)
+                    heatmap[key] = heatmap.get(key, 0) + 1
+            conn.executemany(
+                "INSERT INTO daily_rollups VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(day, session_type) DO UPDATE SET "
+                "completed = completed + excluded.completed, "
+                "completed_minutes = completed_minutes + excluded.completed_minutes, "
+                "skipped = skipped + excluded.skipped, skipped_minutes = skipped_minutes + excluded.skipped_minutes",
+                [key + tuple(totals) for key, totals in days.items()])
+            conn.executemany(
+                "INSERT INTO heatmap_rollups VALUES (?, ?, ?) ON CONFLICT(weekday, hour) DO UPDATE SET "
+                "sessions = sessions + excluded.sessions",
+                [key + (count,) for key, count in heatmap.items()])
+            rolled = conn.execute("DELETE FROM sessions WHERE completed_at < ?", (before,)).rowcount
+            conn.execute(
+                "INSERT INTO history_meta VALUES ('rolled_until', ?) ON CONFLICT(key) DO UPDATE SET "
+                "value = MAX(value, excluded.value)", (before,))
+        return rolled
+
+    def daily_rollups(self):
+        # (jour, type, terminées, minutes terminées, passées, minutes passées), par jour.
+        return self.conn.execute(
+            "SELECT day, session_type, completed, completed_minutes, skipped, skipped_minutes "
+            "FROM daily_rollups ORDER BY day").fetchall()
+
+    def heatmap_rollups(self):
+        return self.conn.execute("SELECT weekday, hour, sessions FROM heatmap_rollups").fetchall()
+
+    @contextmanager
+    def read_snapshot(self):
+        # Lectures successives sur un même état de la base : une consolidation
+        # concurrente ne peut pas faire compter une séance deux fois ou jamais.
+        conn = self.conn
+        if conn.in_transaction:
+            yield self
+            return
+        conn.execute("BEGIN")
+        try:
+            yield self
+        finally:
+            conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class StatsAggregator:
+    """Totaux courants des séances de travail, mis à jour en O(1) par séance.
+
+    Tient le nombre de séances, les minutes cumulées, la série de jours
+    consécutifs (courante et record) et des cumuls par jour et par semaine
+    ISO. rebuild() reconstruit tout en un seul passage sur un flux trié.
+    Comme dans Analytics, les séances passées ne comptent pas.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total_minutes = 0
+        self.days = {}
+        self.weeks = {}
+        self.last_day = None
+        self.run = 0
+        self.longest_streak = 0
+
+    @property
+    def average(self):
+        return self.total_minutes // self.count if self.count else 0
+
+    def current_streak(self, today=None):
+        # La série reste valable tant que le dernier jour actif est hier ou aujourd'hui.
+        today = (today or date.today()).toordinal()
+        if self.last_day is None or today - self.last_day > 1:
+            return 0
+        return self.run
+
+    def add(self, session_type, duration, completed_at, skipped=False):
+        if session_type != "work" or skipped:
+            return
+        self.add_day(date.fromtimestamp(completed_at).toordinal(), 1, duration // 60)
+
+    def add_day(self, ordinal, sessions, minutes):
+        # Séances de travail d'un jour : une séance, ou un total consolidé.
+        self.count += sessions
+        self.total_minutes += minutes
+        new_day = ordinal not in self.days
+        totals = self.days.setdefault(ordinal, [0, 0])
+        totals[0] += sessions
+        totals[1] += minutes
+        week = self.weeks.setdefault(date.fromordinal(ordinal).isocalendar()[:2], [0, 0])
+        week[0] += sessions
+        week[1] += minutes
+        if not new_day:
+            return
+        if self.last_day is None or ordinal == self.last_day + 1:
+            self.run += 1
+        elif ordinal > self.last_day:
+            self.run = 1
+        else:
+            # Séance antérieure au dernier jour connu (import) : on recalcule
+            # les séries depuis les cumuls journaliers.
+            self._recompute_streaks()
+            return
+        self.last_day = ordinal
+        self.longest_streak = max(self.longest_streak, self.run)
+
+    def _recompute_streaks(self):
+        self.run = 0
+        self.longest_streak = 0
+        previous = None
+        for ordinal in sorted(self.days):
+            self.run = self.run + 1 if previous is not None and ordinal == previous + 1 else 1
+            self.longest_streak = max(self.longest_streak, self.run)
+            previous = ordinal
+        self.last_day = previous
+
+    def rebuild(self, rows, rollups=()):
+        # rollups : lignes de HistoryStore.daily_rollups(), antérieures à rows.
+        self.reset()
+        for day, session_type, completed, completed_minutes, skipped, skipped_minutes in rollups:
+            if session_type == "work" and completed:
+                self.add_day(day, completed, completed_minutes)
+        for session_type, duration, completed_at, skipped in rows:
+            self.add(session_type, duration, completed_at, skipped)
+
+
+# ------- EXPORT / IMPORT ---------
+# Formats : JSON Lines (un objet par ligne) ou CSV avec en-tête, choisis
+# d'après l'extension ; un tableau JSON est aussi accepté à l'import. Les deux fonctions travaillent par lots de taille
+# fixe : la mémoire utilisée ne dépend pas de la taille de l'historique.
+
+def _is_csv(path):
+    return path.lower().endswith(".csv")
+
+
+def _check_cancelled(is_cancelled):
+    if is_cancelled is not None and is_cancelled():
+        raise TransferCancelled()
+
+
+def export_history(store, path, progress=None, is_cancelled=None, chunk_size=1000):
+    total = store.count() or 1
+    written = 0
+    tmp_path = path + ".part"
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = None
+            if _is_csv(path):
+                writer = csv.writer(f)
+                writer.writerow(EXPORT_FIELDS)
+            chunk = []
+            for row in store.iter_sessions(chunk_size=chunk_size):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    _check_cancelled(is_cancelled)
+                    _write_chunk(f, writer, chunk)
+                    written += len(chunk)
+                    chunk = []
+                    if progress is not None:
+                        progress(written / total)
+            _write_chunk(f, writer, chunk)
+            written += len(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if progress is not None:
+        progress(1.0)
+    return written
+
+
+def _write_chunk(f, writer, rows):
+    if writer is not None:
+        writer.writerows(rows)
+    else:
+        f.writelines(json.dumps(dict(zip(EXPORT_FIELDS, row))) + "\n" for row in rows)
+
+
+def _parse_record(record, now):
+    session_type = record["session_type"]
+    if session_type not in SESSION_TYPES:
+        raise ValueError(session_type)
+    # Bornes explicites : une valeur infinie ou démesurée ferait échouer les
+    # agrégats (OverflowError) à chaque lancement suivant.
+    duration = float(record["duration"])
+    if not 0 <= duration <= MAX_DURATION:
+        raise ValueError(duration)
+    completed_at = float(record["completed_at"])
+    if not 0 <= completed_at <= now + MAX_CLOCK_SKEW:
+        raise ValueError(completed_at)
+    # "skipped" est absent des exports antérieurs ; CSV le donne en texte.
+    skipped = str(record.get("skipped") or 0).strip().lower() in ("1", "true")
+    return session_type, int(duration), completed_at, int(skipped)
+
+
+def import_history(store, path, progress=None, is_cancelled=None, chunk_size=1000):
+    # Retourne (séances ajoutées, doublons ignorés, lignes invalides, séances
+    # hors de la période conservée).
+    size = os.path.getsize(path) or 1
+    added = duplicates = invalid = expired = 0
+    with open(path, "rb") as raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        if _is_csv(path):
+            records = csv.DictReader(text)
+        elif raw.peek(256).lstrip().startswith(b"["):
+            records = _read_json_array(text)
+        else:
+            records = _read_jsonl(text)
+        chunk = []
+        now = time.time()
+        for record in records:
+            _check_cancelled(is_cancelled)
+            try:
+                chunk.append(_parse_record(record, now))
+            except (KeyError, TypeError, ValueError):
+                invalid += 1
+                continue
+            if len(chunk) >= chunk_size:
+                inserted, dropped = store.add_many(chunk)
+                added += inserted
+                expired += dropped
+                duplicates += len(chunk) - inserted - dropped
+                chunk = []
+                if progress is not None:
+                    progress(min(1.0, raw.tell() / size))
+        if chunk:
+            inserted, dropped = store.add_many(chunk)
+            added += inserted
+            expired += dropped
+            duplicates += len(chunk) - inserted - dropped
+    if progress is not None:
+        progress(1.0)
+    return added, duplicates, invalid, expired
+
+
+def _read_json_array(text, read_size=1 << 16):
+    # Tableau JSON (fichier .json classique) lu élément par élément, à mémoire
+    # constante. Un élément illisible est transmis vide et termine la lecture.
+    decoder = json.JSONDecoder()
+    buf = text.read(read_size).lstrip()[1:]
+    eof = False
+    while True:
+        buf = buf.lstrip()
+        if buf.startswith(","):
+            buf = buf[1:].lstrip()
+        if buf.startswith("]"):
+            return
+        try:
+            if not buf:
+                raise ValueError
+            record, end = decoder.raw_decode(buf)
+        except ValueError:
+            if eof:
+                if buf:
+                    yield {}
+                return
+            more = text.read(read_size)
+            eof = not more
+            buf += more
+            continue
+        yield record
+        buf = buf[end:]
+
+
+def _read_jsonl(lines):
+    # Une ligne JSON illisible est transmise comme enregistrement vide (invalide).
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield {}
@@ -0,0 +1,157 @@
+"""Métriques des chemins critiques de Pomodoro Pro Ultra.
+
+Compteurs et durées en mémoire, sans dépendance hors bibliothèque standard.
+Désactivées, elles ne coûtent qu'un test de booléen par appel instrumenté.
+
+Variables d'environnement :
+    POMODORO_METRICS=1                 active la collecte dès le lancement
+    POMODORO_METRICS_FILE=chemin       instantané périodique (.prom pour le
+                                       format textfile de Prometheus, JSON sinon)
+    POMODORO_METRICS_INTERVAL=10       période de l'instantané, en secondes
+"""
+import functools
+import json
+import os
+import re
+import time
+from collections import deque
+
+# Nombre d'échantillons récents conservés par durée pour les quantiles.
+WINDOW = 512
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Timing:
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=WINDOW)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.recent.append(seconds)
+
+    def quantile(self, q):
+        samples = sorted(self.recent)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum_ms": self.total * 1000,
+            "mean_ms": self.total * 1000 / self.count if self.count else 0.0,
+            "max_ms": self.max * 1000,
+            **{f"p{int(q * 100)}_ms": self.quantile(q) * 1000 for q in QUANTILES}
+        }
+
+
+class Metrics:
+    """Registre de compteurs et de durées (secondes), activable à chaud."""
+
+    def __init__(self, enabled=False, clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self.started = time.time()
+        self.counters = {}
+        self.timings = {}
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = self.timings[name] = Timing()
+        timing.add(seconds)
+
+    def reset(self):
+        self.counters.clear()
+        self.timings.clear()
+        self.started = time.time()
+
+    def snapshot(self):
+        return {
+            "timestamp": time.time(),
+            "uptime_s": time.time() - self.started,
+            "counters": dict(self.counters),
+            "timings": {name: t.summary() for name, t in self.timings.items()}
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, prefix="pomodoro"):
+        lines = []
+        for name in sorted(self.counters):
+            metric = _metric_name(prefix, name) + "_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {self.counters[name]}")
+        for name in sorted(self.timings):
+            timing = self.timings[name]
+            metric = _metric_name(prefix, name) + "_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for q in QUANTILES:
+                lines.append(f'{metric}{{quantile="{q}"}} {timing.quantile(q):.9f}')
+            lines.append(f"{metric}_sum {timing.total:.9f}")
+            lines.append(f"{metric}_count {timing.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Écrit un instantané de façon atomique ; le format suit l'extension."""
+        text = self.to_prometheus() if path.endswith(".prom") else self.to_json() + "\n"
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def lines(self):
+        """Résumé lisible, une métrique par ligne (overlay de débogage)."""
+        out = [f"{name:<24} {value:>8}" for name, value in sorted(self.counters.items())]
+        for name, t in sorted(self.timings.items()):
+            out.append(f"{name:<24} {t.count:>8}  p50 {t.quantile(0.5) * 1000:6.2f} ms"
+                       f"  p99 {t.quantile(0.99) * 1000:6.2f} ms  max {t.max * 1000:6.2f} ms")
+        return out
+
+
+def _metric_name(prefix, name):
+    return f"{prefix}_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def timed(name, metrics=None):
+    """Décorateur : compte et chronomètre chaque appel quand la collecte est active."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            registry = metrics or METRICS
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            t0 = registry.clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registry.observe(name, registry.clock() - t0)
+        return wrapper
+    return decorate
+
+
+def dump_settings():
+    """(chemin, période en secondes) de l'instantané périodique, ou (None, None)."""
+    path = os.environ.get("POMODORO_METRICS_FILE")
+    if not path:
+        return None, None
+    try:
+        interval = float(os.environ.get("POMODORO_METRICS_INTERVAL", "10"))
+    except ValueError:
+        interval = 10.0
+    return path, max(1.0, interval)
+
+
+METRICS = Metrics(enabled=bool(os.environ.get("POMODORO_METRICS") or os.environ.get("POMODORO_METRICS_FILE")))
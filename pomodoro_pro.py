@@ -1,107 +1,400 @@
 import sys
-import json
+import time
+_IMPORT_START = time.perf_counter()
+
+if __name__ == "__main__":
+    # Instance unique : si une instance écoute déjà sur la socket de
+    # contrôle, elle reçoit l'action (show, start, pause, skip…) et ce
+    # lancement s'arrête avant d'importer Qt.
+    from pomodoro_client import hand_over
+    _handed_over = hand_over(sys.argv)
+    if _handed_over is not None:
+        sys.exit(_handed_over)
+
+import errno
 import math
+import operator
+import os
 import random
+import shutil
+import subprocess
+import wave
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
 from datetime import datetime
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from pomodoro_core import (DEFAULT_SETTINGS, SessionEngine, SessionJournal, SettingsStore, StartupProfiler,
+                           diff_settings, user_data_dir)
+from pomodoro_analytics import Analytics, SessionColumns
+from pomodoro_client import GUI_ACTIONS, cli_action, forward, held, shown
+from pomodoro_metrics import METRICS, dump_settings, timed
+from pomodoro_themes import DEFAULT_THEME, ZEN_THEME, load_theme_packs
+from pomodoro_history import (HistoryStore, StatsAggregator, TransferCancelled,
+                              export_history, import_history, retention_cutoff)
+
+STARTUP = StartupProfiler(_IMPORT_START)
+STARTUP.mark("imports")
 
 # ------- ANIMATIONS DECORATIVES ---------
-class AnimatedBird:
-    def __init__(self, bounds):
-        self.x = random.randint(0, bounds.width())
-        self.y = random.randint(20, bounds.height()//2)
-        self.dx = random.choice([-1, 1]) * random.uniform(1.2, 2.2)
-        self.size = random.randint(20, 35)
-        self.color = QColor(random.choice(["#3498DB", "#F7CA18", "#F2784B", "#16A085"]))
-
-    def move(self, bounds):
-        self.x += self.dx
-        if self.x < -self.size or self.x > bounds.width()+self.size:
-            self.x = -self.size if self.dx > 0 else bounds.width()+self.size
-            self.y = random.randint(20, bounds.height()//2)
-
-    def draw(self, painter):
-        painter.save()
-        painter.setBrush(self.color)
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.translate(self.x, self.y)
-        painter.drawEllipse(-self.size//2, -self.size//6, self.size, self.size//2)
-        painter.setBrush(QColor("#fff"))
-        painter.drawEllipse(self.size//3, -self.size//12, self.size//6, self.size//6)
-        painter.restore()
-
-class AnimatedFlower:
-    def __init__(self, bounds):
-        self.x = random.randint(0, bounds.width())
+# Les décorations sont des systèmes de particules : positions, vitesses et
+# phases vivent dans des tableaux contigus mis à jour par lots, et chaque
+# forme (oiseau, fleur) est pré-rendue une fois par taille, couleur et
+# densité de pixels puis simplement copiée à l'écran. Les fleurs le sont
+# aussi par inclinaison, arrondie à FLOWER_ANGLE_STEP radian : aucune copie
+# ne passe par une transformation.
+FLOWER_SWAY = 0.3
+FLOWER_ANGLE_STEP = 0.04
+FLOWER_TILTS = math.ceil(FLOWER_SWAY / FLOWER_ANGLE_STEP)
+_sprite_cache = {}
+
+def _sprite(kind, size, color, dpr, tilt=0):
+    key = (kind, size, color, dpr, tilt)
+    sprite = _sprite_cache.get(key)
+    if sprite is None:
+        if kind == "bird":
+            sprite = _renderBirdSprite(size, color, dpr)
+        else:
+            sprite = _renderFlowerSprite(size, color, dpr, tilt * FLOWER_ANGLE_STEP)
+        _sprite_cache[key] = sprite
+    return sprite
+
+def _newSpritePixmap(width, height, dpr):
+    pixmap = QPixmap(int(math.ceil(width * dpr)), int(math.ceil(height * dpr)))
+    pixmap.setDevicePixelRatio(dpr)
+    pixmap.fill(Qt.GlobalColor.transparent)
+    return pixmap
+
+def _renderBirdSprite(size, color, dpr):
+    # Origine du sprite : (size//2 + 1, size//6 + 1).
+    pixmap = _newSpritePixmap(size + 2, size//2 + 2, dpr)
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.translate(size//2 + 1, size//6 + 1)
+    painter.setPen(Qt.PenStyle.NoPen)
+    painter.setBrush(QColor(color))
+    painter.drawEllipse(-size//2, -size//6, size, size//2)
+    painter.setBrush(QColor("#fff"))
+    painter.drawEllipse(size//3, -size//12, size//6, size//6)
+    painter.end()
+    return pixmap
+
+def _renderFlowerSprite(size, color, dpr, angle):
+    # Sprite carré centré sur le pied de la fleur (origine : size + 3), assez
+    # grand pour toutes les inclinaisons.
+    half = size + 3
+    pixmap = _newSpritePixmap(2*half, 2*half, dpr)
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.translate(half, half)
+    painter.rotate(math.degrees(angle))
+    painter.setPen(QPen(QColor("#27AE60"), 3))
+    painter.drawLine(0, 0, 0, size)
+    painter.setBrush(QColor(color))
+    painter.setPen(Qt.PenStyle.NoPen)
+    for i in range(6):
+        painter.drawEllipse(int(-size//4), int(-size), size//2, size)
+        painter.rotate(60)
+    painter.setBrush(QColor("#FDF6E3"))
+    painter.drawEllipse(int(-size//5), int(-size//5), int(size//2.5), int(size//2.5))
+    painter.end()
+    return pixmap
+
+class BirdFlock:
+    COLORS = ["#3498DB", "#F7CA18", "#F2784B", "#16A085"]
+
+    def __init__(self, bounds, count):
+        self.x = array("d", (random.randint(0, bounds.width()) for _ in range(count)))
+        self.y = array("d", (random.randint(20, bounds.height()//2) for _ in range(count)))
+        self.dx = array("d", (random.choice([-1, 1]) * random.uniform(1.2, 2.2) for _ in range(count)))
+        self.size = array("i", (random.randint(20, 35) for _ in range(count)))
+        self.color = array("b", (random.randrange(len(self.COLORS)) for _ in range(count)))
+        self._sprites = None
+        self._sprites_dpr = None
+
+    def __len__(self):
+        return len(self.x)
+
+    def move(self, bounds, steps=1.0):
+        # dx est exprimé par image nominale ; steps = images nominales écoulées.
+        if steps == 1.0:
+            self.x = array("d", map(operator.add, self.x, self.dx))
+        else:
+            self.x = array("d", [x + dx * steps for x, dx in zip(self.x, self.dx)])
+        width = bounds.width()
+        wrapped = [i for i, (x, size) in enumerate(zip(self.x, self.size)) if x < -size or x > width + size]
+        for i in wrapped:
+            self.x[i] = -self.size[i] if self.dx[i] > 0 else width + self.size[i]
+            self.y[i] = random.randint(20, bounds.height()//2)
+
+    def dirtyRect(self, bounds):
+        # Bande horizontale couvrant tous les oiseaux.
+        if not len(self):
+            return QRect()
+        reach = max(self.size)
+        top = int(min(self.y)) - reach
+        bottom = int(max(self.y)) + reach
+        return QRect(0, top, bounds.width(), bottom - top)
+
+    def draw(self, painter, dpr):
+        # Sprite de chaque oiseau, résolu une fois par densité de pixels.
+        if self._sprites_dpr != dpr:
+            self._sprites = [_sprite("bird", size, self.COLORS[color], dpr) for size, color in zip(self.size, self.color)]
+            self._sprites_dpr = dpr
+        for x, y, size, sprite in zip(self.x, self.y, self.size, self._sprites):
+            painter.drawPixmap(int(x) - size//2 - 1, int(y) - size//6 - 1, sprite)
+
+class FlowerBed:
+    COLORS = ["#E67E22", "#F1C40F", "#E74C3C", "#9B59B6"]
+
+    def __init__(self, bounds, count):
+        self.x = array("d", (random.randint(0, bounds.width()) for _ in range(count)))
         self.base_y = bounds.height() - 30
-        self.angle = random.uniform(0, 2*math.pi)
-        self.size = random.randint(18, 27)
-        self.color = QColor(random.choice(["#E67E22", "#F1C40F", "#E74C3C", "#9B59B6"]))
-        self.wind_phase = random.uniform(0, 2*math.pi)
+        self.size = array("i", (random.randint(18, 27) for _ in range(count)))
+        self.color = array("b", (random.randrange(len(self.COLORS)) for _ in range(count)))
+        self.wind_phase = array("d", (random.uniform(0, 2*math.pi) for _ in range(count)))
+        self._sprites = None
+        self._sprites_dpr = None
+        self.sway(0.0)
+
+    def __len__(self):
+        return len(self.x)
 
     def sway(self, t):
-        self.angle = math.sin(t + self.wind_phase) * 0.3
-
-    def draw(self, painter):
-        painter.save()
-        painter.translate(self.x, self.base_y)
-        painter.rotate(math.degrees(self.angle))
-        painter.setPen(QPen(QColor("#27AE60"), 3))
-        painter.drawLine(0, 0, 0, self.size)
-        painter.setBrush(self.color)
-        painter.setPen(Qt.PenStyle.NoPen)
-        for i in range(6):
-            painter.save()
-            painter.rotate(i*60)
-            painter.drawEllipse(int(-self.size//4), int(-self.size), self.size//2, self.size)
-            painter.restore()
-        painter.setBrush(QColor("#FDF6E3"))
-        painter.drawEllipse(int(-self.size//5), int(-self.size//5), int(self.size//2.5), int(self.size//2.5))
-        painter.restore()
+        # Inclinaison en pas de FLOWER_ANGLE_STEP, de -FLOWER_TILTS à FLOWER_TILTS.
+        sin, scale = math.sin, FLOWER_SWAY / FLOWER_ANGLE_STEP
+        self.tilt = array("b", [round(sin(t + phase) * scale) for phase in self.wind_phase])
+
+    def dirtyRect(self, bounds):
+        # Bande couvrant toutes les inclinaisons possibles autour des pieds.
+        if not len(self):
+            return QRect()
+        reach = int(max(self.size) * 1.2) + 2
+        return QRect(0, self.base_y - reach, bounds.width(), 2*reach)
+
+    def draw(self, painter, dpr):
+        if self._sprites_dpr != dpr:
+            # Une rangée de sprites par fleur, indexée par inclinaison (les
+            # pas négatifs depuis la fin) et remplie à la demande.
+            self._sprites = [[None] * (2*FLOWER_TILTS + 1) for _ in range(len(self))]
+            self._sprites_dpr = dpr
+        y = self.base_y
+        for x, tilt, size, color, row in zip(self.x, self.tilt, self.size, self.color, self._sprites):
+            sprite = row[tilt]
+            if sprite is None:
+                sprite = row[tilt] = _sprite("flower", size, self.COLORS[color], dpr, tilt)
+            half = size + 3
+            painter.drawPixmap(int(x) - half, y - half, sprite)
 
 # ------- TIMER LOGIC ---------
 class PomodoroTimer(QTimer):
+    """Pilote Qt du SessionEngine : un seul réveil armé sur la prochaine échéance."""
     timeChanged = pyqtSignal(int)
     sessionCompleted = pyqtSignal(str)
     paused = pyqtSignal(int, str)
 
-    def __init__(self):
+    # En dessous de ce délai, le prochain réveil est programmé en PreciseTimer.
+    PRECISE_THRESHOLD_MS = 2000
+
+    def __init__(self, engine=None):
         super().__init__()
+        self.setSingleShot(True)
         self.timeout.connect(self.updateTime)
-        self.remaining_time = 0
-        self.session_type = "work"
-        self.paused_flag = False
+        self.engine = engine or SessionEngine()
+        self.engine.subscribe(self._onEngineEvent)
+        self.remaining_time = self.engine.remaining_seconds()
+        # Pas des réveils intermédiaires, en secondes ; None : seulement
+        # l'échéance de la séance et le démarrage automatique.
+        self.tick_interval = 1.0
+        self._due = None
+        app = QCoreApplication.instance()
+        if isinstance(app, QGuiApplication):
+            app.applicationStateChanged.connect(self._onApplicationStateChanged)
 
-    def startSession(self, duration, session_type):
-        self.remaining_time = duration
-        self.session_type = session_type
-        self.paused_flag = False
-        self.start(1000)
+    @property
+    def session_type(self):
+        return self.engine.current_session
+
+    @property
+    def paused_flag(self):
+        return self.engine.is_paused
 
+    def _onApplicationStateChanged(self, state):
+        if state == Qt.ApplicationState.ApplicationActive:
+            self.resync()
+
+    def _onEngineEvent(self, event, data):
+        if event == "completed":
+            self._setRemaining(0)
+            self.sessionCompleted.emit(data["session_type"])
+        elif event == "paused":
+            self.paused.emit(data["remaining"], data["session_type"])
+        elif event == "started":
+            self._setRemaining(data["duration"])
+        elif event == "restored":
+            self._setRemaining(data["remaining"])
+        self._scheduleNext()
+
+    def _setRemaining(self, seconds):
+        if seconds != self.remaining_time:
+            self.remaining_time = seconds
+            self.timeChanged.emit(seconds)
+
+    @timed("timer.tick")
     def updateTime(self):
-        if self.paused_flag:
+        if METRICS.enabled and self._due is not None:
+            METRICS.observe("timer.tick_lateness", max(0.0, self.engine.clock() - self._due))
+        self.engine.advance()
+        if self.engine.is_running:
+            self._setRemaining(self.engine.countdown.remaining_seconds())
+        self._scheduleNext()
+
+    def setTickInterval(self, seconds):
+        if seconds == self.tick_interval:
             return
-        if self.remaining_time > 0:
-            self.remaining_time -= 1
-            self.timeChanged.emit(self.remaining_time)
+        self.tick_interval = seconds
+        if self.isActive():
+            self._scheduleNext()
+
+    def _scheduleNext(self):
+        # Réveil au prochain pas affiché (une seconde par défaut) ou au
+        # démarrage automatique, calculé depuis les échéances absolues du
+        # moteur : un tick en retard ne décale pas les suivants.
+        countdown = self.engine.countdown
+        step = countdown.next_step(self.tick_interval) if self.tick_interval else countdown.deadline
+        candidates = [t for t in (step, self.engine.auto_start_at) if t is not None]
+        if not candidates:
+            self._due = None
+            self.stop()
+            return
+        self._due = min(candidates)
+        now = self.engine.clock()
+        delay_ms = max(0.0, (min(candidates) - now) * 1000)
+        final_ms = (self.engine.next_wakeup() - now) * 1000
+        if final_ms <= self.PRECISE_THRESHOLD_MS:
+            self.setTimerType(Qt.TimerType.PreciseTimer)
         else:
+            self.setTimerType(Qt.TimerType.CoarseTimer)
+        self.start(int(math.ceil(delay_ms)))
+
+    def resync(self):
+        # Après une sortie de veille ou un blocage de la boucle d'événements,
+        # recalcule immédiatement l'état depuis les échéances.
+        if self.engine.next_wakeup() is not None:
             self.stop()
-            self.sessionCompleted.emit(self.session_type)
+            self.updateTime()
+
+# ------- THÈMES ---------
+def _cssBackground(colors):
+    if len(colors) == 1:
+        return colors[0]
+    return f"qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 {colors[0]}, stop:1 {colors[1]})"
 
-    def pause(self):
-        self.paused_flag = True
+class CompiledTheme:
+    """Pack de thème prêt à peindre : stylos, pinceaux et couleurs construits
+    une fois, avec le fragment de feuille de style correspondant."""
 
-    def resume(self):
-        self.paused_flag = False
+    __slots__ = ("name", "label", "arc_colors", "arc_pens", "warning_pen", "critical_pen",
+                 "dial_brush", "text_color", "label_color", "stylesheet")
 
-    def reset(self):
-        self.stop()
-        self.paused_flag = False
+    def __init__(self, pack):
+        self.name = pack["name"]
+        self.label = pack["label"]
+        self.arc_colors = {t: QColor(c) for t, c in pack["arc"].items()}
+        self.arc_pens = {t: self._arcPen(c) for t, c in self.arc_colors.items()}
+        self.warning_pen = self._arcPen(QColor(pack["warning"]))
+        self.critical_pen = self._arcPen(QColor(pack["critical"]))
+        # Dégradé relatif à la forme peinte : indépendant de la taille du widget.
+        dial = pack["dial"]
+        gradient = QRadialGradient(0.5, 0.5, 0.5)
+        gradient.setCoordinateMode(QGradient.CoordinateMode.ObjectBoundingMode)
+        gradient.setColorAt(0, QColor(dial[0]))
+        gradient.setColorAt(1, QColor(dial[-1]))
+        self.dial_brush = QBrush(gradient)
+        self.text_color = QColor(pack["text"])
+        self.label_color = QColor(pack["label_color"])
+        self.stylesheet = (
+            f"QMainWindow#pomodoroApp {{ background: {_cssBackground(pack['window'])}; }}\n"
+            f"QPushButton#navButton:checked {{ background: {pack['accent']}; color: white; }}")
+
+    @staticmethod
+    def _arcPen(color):
+        return QPen(color, 12, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap)
+
+class ThemeRegistry:
+    """Packs validés une fois au premier accès ; seuls les MAX_COMPILED
+    derniers thèmes utilisés restent compilés."""
+    MAX_COMPILED = 4
+
+    def __init__(self, packs=None):
+        self._packs = packs
+        self._compiled = OrderedDict()
+
+    @property
+    def packs(self):
+        if self._packs is None:
+            self._packs = load_theme_packs()
+        return self._packs
+
+    def names(self):
+        return list(self.packs)
+
+    def label(self, name):
+        return self.packs[name]["label"]
+
+    def get(self, name):
+        theme = self._compiled.get(name)
+        if theme is None:
+            theme = CompiledTheme(self.packs[name])
+            self._compiled[name] = theme
+            if len(self._compiled) > self.MAX_COMPILED:
+                self._compiled.popitem(last=False)
+        else:
+            self._compiled.move_to_end(name)
+        return theme
+
+    def resolve(self, name, zen=False):
+        # Le mode Zen impose son pack ; un thème inconnu retombe sur le thème par défaut.
+        if zen and ZEN_THEME in self.packs:
+            name = ZEN_THEME
+        return self.get(name if name in self.packs else DEFAULT_THEME)
+
+THEMES = ThemeRegistry()
+
+# ------- INTERPOLATION ---------
+class Tween:
+    """Interpolation de start à end en `duration` secondes, pilotée par le
+    temps monotone écoulé et une courbe QEasingCurve (à la QVariantAnimation).
+    La valeur ne dépend que de l'instant demandé, pas du nombre d'images."""
+
+    __slots__ = ("start", "end", "duration", "started_at", "easing")
+
+    def __init__(self, start, end, duration, easing=QEasingCurve.Type.OutCubic, now=None):
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.started_at = time.monotonic() if now is None else now
+        self.easing = QEasingCurve(easing)
+
+    def finished(self, now):
+        return now - self.started_at >= self.duration
+
+    def value(self, now):
+        t = (now - self.started_at) / self.duration if self.duration > 0 else 1.0
+        if t >= 1.0:
+            return self.end
+        return self.start + (self.end - self.start) * self.easing.valueForProgress(max(0.0, t))
 
 # ------- CIRCULAR PROGRESS WITH ANIMATION & DECOR ---------
 class CircularProgressWidget(QWidget):
+    FRAME_INTERVAL_MS = 50
+    # Durée de la transition de l'arc et vitesse du décor, en secondes réelles.
+    ARC_TWEEN_S = 0.4
+    SWAY_SPEED = 1.2
+    SESSION_NAMES = {"work": "TRAVAIL", "break": "PAUSE", "long_break": "PAUSE LONGUE"}
+
     def __init__(self):
         super().__init__()
         self.setFixedSize(340, 340)
@@ -109,90 +402,318 @@ class CircularProgressWidget(QWidget):
         self.total_time = 1500
         self.remaining_time = 1500
         self.session_type = "work"
-        self.theme_colors = {
-            "modern": {"work": "#FF6B6B", "break": "#4ECDC4", "long_break": "#45B7D1"},
-            "forest": {"work": "#2ECC71", "break": "#27AE60", "long_break": "#16A085"},
-            "sunset": {"work": "#E67E22", "break": "#F39C12", "long_break": "#D35400"},
-            "ocean": {"work": "#3498DB", "break": "#5DADE2", "long_break": "#2980B9"},
-            "dark": {"work": "#8E44AD", "break": "#9B59B6", "long_break": "#7D3C98"},
-            "zen": {"work": "#B7E9F7", "break": "#FFEDC2", "long_break": "#FDC2D1"}
-        }
-        self.current_theme = "modern"
+        self.theme = THEMES.resolve(DEFAULT_THEME)
         self._animation_progress = 0
-        self._anim_timer = QTimer()
+        # Le timer d'animation ne tourne que s'il y a un mouvement visible :
+        # transition de l'arc en cours, ou décor animé pendant une séance.
+        self._anim_timer = QTimer(self)
+        self._anim_timer.setInterval(self.FRAME_INTERVAL_MS)
         self._anim_timer.timeout.connect(self._animate)
-        self._anim_timer.start(50)
-        self.birds = [AnimatedBird(self.rect()) for _ in range(3)]
-        self.flowers = [AnimatedFlower(self.rect()) for _ in range(4)]
+        self._decor_active = False
+        self._animations_enabled = True
+        self._watched_window = None
+        self._dirty = QRegion()
+        outer = QRect(17, 17, 306, 306)
+        inner = QRect(33, 33, 274, 274)
+        self._arc_region = QRegion(outer, QRegion.RegionType.Ellipse).subtracted(QRegion(inner, QRegion.RegionType.Ellipse))
+        self._text_rect = QRect(0, 65, 340, 90)
+        self._time_font = QFont("Segoe UI", 38, QFont.Weight.Bold)
+        self._label_font = QFont("Segoe UI", 14, QFont.Weight.Bold)
+        self._static_layer = None
+        self._static_key = None
+        self.birds = BirdFlock(self.rect(), 3)
+        self.flowers = FlowerBed(self.rect(), 4)
+        self._arc_tween = None
         self._time_anim = 0
+        self._last_frame = None
+
+    def setDecorationCount(self, birds, flowers):
+        self.birds = BirdFlock(self.rect(), birds)
+        self.flowers = FlowerBed(self.rect(), flowers)
+        self._requestRepaint(self.rect())
 
+    @timed("progress.set_progress")
     def setProgress(self, remaining, total, session_type):
+        if session_type != self.session_type:
+            self._requestRepaint(self.rect())
+        if remaining != self.remaining_time:
+            self._requestRepaint(self._text_rect)
         self.remaining_time = remaining
         self.total_time = total
         self.session_type = session_type
         desired_progress = (total - remaining) / total
         if abs(self.progress - desired_progress) > 0.01:
-            self._target_progress = desired_progress
+            # Repart de la valeur affichée : une nouvelle cible en cours de
+            # transition ne provoque pas de saut.
+            self._arc_tween = Tween(self.progress, desired_progress, self.ARC_TWEEN_S)
+            self._updateFrameScheduler()
         else:
             self.progress = desired_progress
-        self.update()
+            self._arc_tween = None
+        self._requestRepaint(self._arc_region)
+
+    @property
+    def current_theme(self):
+        return self.theme.name
 
     def setTheme(self, theme):
-        if theme in self.theme_colors:
-            self.current_theme = theme
-        self.update()
+        # theme : CompiledTheme du registre ; changer de thème remplace une référence.
+        if theme is not self.theme:
+            self.theme = theme
+            self.invalidateLayers()
+            self._requestRepaint(self.rect())
+
+    def setAnimating(self, active):
+        self._decor_active = active
+        self._updateFrameScheduler()
+
+    def setAnimationsEnabled(self, enabled):
+        self._animations_enabled = enabled
+        self._updateFrameScheduler()
+
+    def _hasMotion(self):
+        return self._arc_tween is not None or (self._decor_active and self._animations_enabled)
+
+    def _canRender(self):
+        if not self.isVisible():
+            return False
+        window = self.window()
+        if window.isMinimized():
+            return False
+        handle = window.windowHandle()
+        return handle is None or handle.isExposed()
+
+    def _updateFrameScheduler(self):
+        if self._hasMotion() and self._canRender():
+            if not self._anim_timer.isActive():
+                self._last_frame = None
+                self._anim_timer.start()
+        else:
+            self._anim_timer.stop()
 
+    def _requestRepaint(self, area):
+        # Les demandes sont fusionnées et envoyées en un seul update() par image.
+        self._dirty = self._dirty.united(area)
+        if not self._anim_timer.isActive():
+            self._flushRepaint()
+
+    def _flushRepaint(self):
+        if not self._dirty.isEmpty():
+            self.update(self._dirty)
+            self._dirty = QRegion()
+
+    def showEvent(self, event):
+        window = self.window()
+        if window is not self._watched_window:
+            if self._watched_window is not None:
+                self._watched_window.removeEventFilter(self)
+            window.installEventFilter(self)
+            self._watched_window = window
+        super().showEvent(event)
+        self._updateFrameScheduler()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._updateFrameScheduler()
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.WindowStateChange:
+            self._updateFrameScheduler()
+        return False
+
+    @timed("progress.animate")
     def _animate(self):
-        if hasattr(self, '_target_progress'):
-            diff = self._target_progress - self.progress
-            self.progress += diff * 0.1
-            if abs(diff) < 0.01:
-                self.progress = self._target_progress
-                del self._target_progress
-            self.update()
-        for bird in self.birds:
-            bird.move(self.rect())
-        self._time_anim += 0.06
-        for flower in self.flowers:
-            flower.sway(self._time_anim)
-        self.update()
+        if not self._canRender():
+            self._anim_timer.stop()
+            return
+        now = time.monotonic()
+        # Pas de temps réel depuis l'image précédente, borné pour qu'une
+        # reprise après suspension ne fasse pas sauter le décor.
+        elapsed = self.FRAME_INTERVAL_MS / 1000 if self._last_frame is None else min(now - self._last_frame, 0.25)
+        self._last_frame = now
+        tween = self._arc_tween
+        if tween is not None:
+            self.progress = tween.value(now)
+            if tween.finished(now):
+                self._arc_tween = None
+            self._dirty = self._dirty.united(self._arc_region)
+        if self._decor_active and self._animations_enabled:
+            bounds = self.rect()
+            self._dirty = self._dirty.united(self.birds.dirtyRect(bounds))
+            self.birds.move(bounds, elapsed * 1000 / self.FRAME_INTERVAL_MS)
+            self._dirty = self._dirty.united(self.birds.dirtyRect(bounds))
+            self._time_anim += elapsed * self.SWAY_SPEED
+            self.flowers.sway(self._time_anim)
+            self._dirty = self._dirty.united(self.flowers.dirtyRect(bounds))
+        self._flushRepaint()
+        if not self._hasMotion():
+            self._anim_timer.stop()
+
+    def _staticLayer(self):
+        # Fond dégradé et libellé de séance, rendus une fois par
+        # (thème, type de séance, taille, densité de pixels).
+        dpr = self.devicePixelRatioF()
+        key = (self.theme, self.session_type, self.width(), self.height(), dpr)
+        if self._static_key != key:
+            pixmap = QPixmap(int(self.width() * dpr), int(self.height() * dpr))
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setBrush(self.theme.dial_brush)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.drawEllipse(0, 0, self.width(), self.height())
+            painter.setFont(self._label_font)
+            painter.setPen(self.theme.label_color)
+            painter.drawText(QRect(0, 170, 340, 40), Qt.AlignmentFlag.AlignCenter,
+                             self.SESSION_NAMES.get(self.session_type, "SESSION"))
+            painter.end()
+            self._static_layer = pixmap
+            self._static_key = key
+        return self._static_layer
+
+    def _arcPen(self):
+        remaining_percent = self.remaining_time / self.total_time if self.total_time else 1
+        if remaining_percent < 0.1:
+            return self.theme.critical_pen
+        if remaining_percent < 0.25:
+            return self.theme.warning_pen
+        return self.theme.arc_pens[self.session_type]
+
+    def invalidateLayers(self):
+        self._static_key = None
+        self._static_layer = None
 
+    def resizeEvent(self, event):
+        self.invalidateLayers()
+        super().resizeEvent(event)
+
+    @timed("progress.paint")
     def paintEvent(self, event):
+        # Une exposition de la fenêtre relance l'animation si elle avait été
+        # suspendue faute de surface visible.
+        if not self._anim_timer.isActive() and self._hasMotion():
+            self._updateFrameScheduler()
         painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._staticLayer())
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        gradient = QRadialGradient(self.width()//2, self.height()//2, self.width()//2)
-        gradient.setColorAt(0, QColor("#f8fafc"))
-        gradient.setColorAt(1, QColor("#e9ecef"))
-        painter.setBrush(gradient)
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.drawEllipse(0, 0, self.width(), self.height())
-        for flower in self.flowers:
-            flower.draw(painter)
-        color = QColor(self.theme_colors[self.current_theme][self.session_type])
-        remaining_percent = self.remaining_time / self.total_time if self.total_time else 1
-        if remaining_percent < 0.1:
-            color = QColor("#FF4757")
-        elif remaining_percent < 0.25:
-            color = QColor("#FFA502")
-        painter.setPen(QPen(color, 12, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap))
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        dpr = self.devicePixelRatioF()
+        self.flowers.draw(painter, dpr)
+        painter.setPen(self._arcPen())
         start_angle = 90 * 16
         span_angle = -int(self.progress * 360 * 16)
         painter.drawArc(25, 25, 290, 290, start_angle, span_angle)
-        painter.setPen(QColor("#212121"))
-        font = QFont("Segoe UI", 38, QFont.Weight.Bold)
-        painter.setFont(font)
+        painter.setPen(self.theme.text_color)
+        painter.setFont(self._time_font)
         minutes = self.remaining_time // 60
         seconds = self.remaining_time % 60
-        time_text = f"{minutes:02d}:{seconds:02d}"
-        painter.drawText(QRect(0, 65, 340, 90), Qt.AlignmentFlag.AlignCenter, time_text)
-        painter.setFont(QFont("Segoe UI", 14, QFont.Weight.Bold))
-        painter.setPen(QColor(100, 100, 100))
-        session_names = {"work": "TRAVAIL", "break": "PAUSE", "long_break": "PAUSE LONGUE"}
-        painter.drawText(QRect(0, 170, 340, 40), Qt.AlignmentFlag.AlignCenter, session_names.get(self.session_type, "SESSION"))
-        for bird in self.birds:
-            bird.draw(painter)
+        painter.drawText(self._text_rect, Qt.AlignmentFlag.AlignCenter, f"{minutes:02d}:{seconds:02d}")
+        self.birds.draw(painter, dpr)
         painter.end()
 
+# --------- STYLE ---------
+def adjustColor(color, factor):
+    c = QColor(color)
+    r = min(255, int(c.red() * factor))
+    g = min(255, int(c.green() * factor))
+    b = min(255, int(c.blue() * factor))
+    return f"rgb({r},{g},{b})"
+
+class StyleEngine:
+    # Une seule feuille de style, posée sur QApplication et mise en cache par
+    # (thème, mode zen) ; les couleurs propres au thème viennent de son pack.
+    # Les widgets sont ciblés par objectName et par la propriété dynamique
+    # "accent" des boutons.
+    ACCENTS = ["#4ECDC4", "#FF6B6B", "#95A5A6", "#FDCB6E", "#B2BEC3"]
+    _cache = {}
+    _current = None
+
+    @staticmethod
+    def accentKey(color):
+        return QColor(color).name().lstrip("#").upper()
+
+    @classmethod
+    def registerAccent(cls, color):
+        key = cls.accentKey(color)
+        if key not in (cls.accentKey(c) for c in cls.ACCENTS):
+            cls.ACCENTS.append(color)
+            cls._cache.clear()
+            if cls._current is not None:
+                cls.apply(*cls._current)
+        return key
+
+    @classmethod
+    def stylesheet(cls, theme="modern", zen=False):
+        key = (theme, zen)
+        if key not in cls._cache:
+            cls._cache[key] = cls._build(theme, zen)
+        return cls._cache[key]
+
+    @classmethod
+    def apply(cls, theme="modern", zen=False):
+        app = QApplication.instance()
+        if app is None:
+            return
+        cls._current = (theme, zen)
+        sheet = cls.stylesheet(theme, zen)
+        if app.styleSheet() != sheet:
+            app.setStyleSheet(sheet)
+
+    @classmethod
+    def _build(cls, theme, zen):
+        parts = [f"""
+            QWidget#navBar, QWidget#navBar QLabel {{ background: #fff; border-bottom: 1.5px solid #E9ECEF; }}
+            QLabel#appTitle {{ color: #2C3E50; letter-spacing: 1.8px; }}
+            QPushButton#navButton {{
+                background: transparent; border: none; color: #7F8C8D; font-size: 15px;
+                font-weight: bold; padding: 12px 15px; border-radius: 10px;
+            }}
+            QPushButton#navButton:hover {{ background: #F1F2F6; color: #2C3E50; }}
+            QLabel#sessionInfo {{ color: #7F8C8D; margin-top: 10px; letter-spacing: 1.2px; }}
+            QLabel#focusLabel {{ color: #95A5A6; }}
+            QLabel#metricsOverlay {{
+                background: rgba(44, 62, 80, 215); color: #ECF0F1; border-radius: 8px;
+                padding: 8px 10px; font-family: 'DejaVu Sans Mono', 'Consolas', monospace; font-size: 11px;
+            }}
+            QPushButton#iconButton {{ border: none; border-radius: 18px; padding: 10px; }}
+            QPushButton#modernButton {{
+                border: none; color: white; font-size: 17px; font-family: 'Segoe UI';
+                font-weight: 600; border-radius: 24px; padding: 12px 28px; letter-spacing: 1.2px;
+            }}
+            QLabel#historyTitle, QLabel#statsTitle {{ color: #455A64; margin-bottom: 15px; }}
+            QLabel#statLabel, QLabel#transferStatus {{ color: #636E72; }}
+            QListView#historyList {{ border: none; background: #F9FAFB; font-size: 15px; border-radius: 16px; }}
+            QListView#historyList::item:selected {{ background: #D6EAF8; }}
+            QWidget#settingsPage QScrollArea {{
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #F8F9FA, stop:1 #E9ECEF);
+            }}
+            QWidget#settingsPage, QWidget#settingsPage QWidget {{ background: transparent; }}
+            QScrollArea#settingsScroll {{ border: none; background: transparent; }}
+            QLabel#settingsTitle {{ color: #2C3E50; margin-bottom: 20px; }}
+            QGroupBox#settingsGroup {{
+                font-weight: bold; color: #2C3E50; border: 2px solid #CCC; border-radius: 12px; margin-top: 12px; padding-top: 12px;
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #F8F9FA, stop:1 #E9ECEF);
+            }}
+            QGroupBox#settingsGroup::title {{ left: 10px; color: #2C3E50; }}
+            QGroupBox#settingsGroup QLabel {{ color: #2C3E50; }}
+            QGroupBox#settingsGroup QCheckBox {{ color: #2C3E50; font-size: 14px; }}
+            QGroupBox#settingsGroup QSpinBox, QGroupBox#settingsGroup QLineEdit, QGroupBox#settingsGroup QComboBox {{
+                background: #fff; border: 1px solid #CCC; border-radius: 8px; padding: 6px; font-size: 14px; color: #2C3E50;
+            }}
+        """, THEMES.resolve(theme, zen).stylesheet]
+        for color in cls.ACCENTS:
+            key = cls.accentKey(color)
+            parts.append(f"""
+            QPushButton#iconButton[accent="{key}"] {{ background-color: {color}; }}
+            QPushButton#modernButton[accent="{key}"] {{ background-color: {color}; }}
+            QPushButton#modernButton[accent="{key}"]:hover {{ background-color: {adjustColor(color, 0.85)}; }}
+            QPushButton#modernButton[accent="{key}"]:pressed {{ background-color: {adjustColor(color, 0.7)}; }}
+            """)
+        # Après les accents pour l'emporter à spécificité égale.
+        parts.append("QPushButton#iconButton:hover { background-color: #2C3E50; }")
+        return "\n".join(parts)
+
 # --------- BUTTONS ---------
 class IconButton(QPushButton):
     def __init__(self, icon, tooltip="", color="#4ECDC4"):
@@ -200,17 +721,8 @@ class IconButton(QPushButton):
         self.setIcon(icon)
         self.setIconSize(QSize(32, 32))
         self.setToolTip(tooltip)
-        self.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {color};
-                border: none;
-                border-radius: 18px;
-                padding: 10px;
-            }}
-            QPushButton:hover {{
-                background-color: #2C3E50;
-            }}
-        """)
+        self.setObjectName("iconButton")
+        self.setProperty("accent", StyleEngine.registerAccent(color))
 
 class ModernButton(QPushButton):
     def __init__(self, text, color="#4ECDC4", icon=None):
@@ -220,67 +732,193 @@ class ModernButton(QPushButton):
         if icon:
             self.setIcon(icon)
             self.setIconSize(QSize(24, 24))
-        self.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {color};
-                border: none;
-                color: white;
-                font-size: 17px;
-                font-family: 'Segoe UI';
-                font-weight: 600;
-                border-radius: 24px;
-                padding: 12px 28px;
-                letter-spacing: 1.2px;
-            }}
-            QPushButton:hover {{
-                background-color: {self.adjustColor(color, 0.85)};
-                transform: scale(1.04);
-            }}
-            QPushButton:pressed {{
-                background-color: {self.adjustColor(color, 0.7)};
-            }}
-        """)
-
-    def adjustColor(self, color, factor):
-        c = QColor(color)
-        r = min(255, int(c.red() * factor))
-        g = min(255, int(c.green() * factor))
-        b = min(255, int(c.blue() * factor))
-        return f"rgb({r},{g},{b})"
+        self.setObjectName("modernButton")
+        self.setProperty("accent", StyleEngine.registerAccent(color))
 
 # --------- HISTORY ---------
+class SessionHistoryModel(QAbstractListModel):
+    # Les lignes sont lues par pages depuis le store, en colonnes compactes ;
+    # seules quelques pages récemment consultées restent en mémoire et le
+    # texte n'est formaté que pour les lignes affichées.
+    PAGE_SIZE = 200
+    MAX_CACHED_PAGES = 6
+    _icons = {}
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._total = 0
+        self._rows = 0
+        self._pages = OrderedDict()
+
+    @classmethod
+    def icon(cls, session_type):
+        key = "work" if session_type == "work" else "break"
+        if key not in cls._icons:
+            cls._icons[key] = QIcon("clock") if key == "work" else QIcon("media-playback-pause")
+        return cls._icons[key]
+
+    def reload(self):
+        self.beginResetModel()
+        self._total = self.store.count()
+        self._rows = min(self.PAGE_SIZE, self._total)
+        self._pages.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._rows < self._total
+
+    def fetchMore(self, parent):
+        count = min(self.PAGE_SIZE, self._total - self._rows)
+        if parent.isValid() or count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._rows, self._rows + count - 1)
+        self._rows += count
+        self.endInsertRows()
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is None:
+            page = SessionColumns(self.store.recent(self.PAGE_SIZE, number * self.PAGE_SIZE))
+            self._pages[number] = page
+            if len(self._pages) > self.MAX_CACHED_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(number)
+        return page
+
+    @staticmethod
+    def formatSession(record):
+        session_names = {"work": "Travail", "break": "Pause", "long_break": "Pause longue"}
+        completed_time = datetime.fromtimestamp(record.completed_at)
+        text = f"{session_names.get(record.session_type, 'Session')} • {record.duration // 60}m • {completed_time.strftime('%H:%M %d/%m/%Y')}"
+        return text + " • passée" if record.skipped else text
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        number, offset = divmod(index.row(), self.PAGE_SIZE)
+        page = self._page(number)
+        if offset >= len(page):
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.formatSession(page[offset])
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.icon(page[offset].session_type)
+        return None
+
+    def prependSession(self):
+        # Nouvelle séance en tête : les pages en cache sont décalées d'une ligne.
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._total += 1
+        self._rows += 1
+        self._pages.clear()
+        self.endInsertRows()
+
+class HistoryTransferWorker(QObject):
+    # Exécuté dans un QThread avec sa propre connexion SQLite. Après un
+    # import, rebuild_stats reconstruit aussi les totaux (stats, jusqu'à la
+    # séance last_id) avant d'émettre finished ou failed.
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, mode, store_path, file_path, rebuild_stats=False):
+        super().__init__()
+        self.mode = mode
+        self.store_path = store_path
+        self.file_path = file_path
+        self.rebuild_stats = rebuild_stats
+        self.stats = None
+        self.last_id = 0
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        store = HistoryStore(self.store_path)
+        report = lambda fraction: self.progress.emit(int(fraction * 100))
+        is_cancelled = lambda: self._cancelled
+        done = self.failed
+        try:
+            if self.mode == "export":
+                count = export_history(store, self.file_path, report, is_cancelled)
+                message = f"{count} séances exportées"
+            else:
+                added, duplicates, invalid, expired = import_history(store, self.file_path, report, is_cancelled)
+                message = f"{added} séances importées, {duplicates} doublons, {invalid} lignes invalides"
+                if expired:
+                    message += f", {expired} antérieures à la période conservée"
+            done = self.finished
+        except TransferCancelled:
+            message = "Opération annulée"
+        except Exception as e:
+            message = f"Erreur : {e}"
+        try:
+            # Même après une annulation : les lots déjà importés sont écrits.
+            if self.mode == "import" and self.rebuild_stats:
+                self.rebuildStats(store)
+        except Exception as e:
+            message += f" (totaux non recalculés : {e})"
+        finally:
+            store.close()
+        done.emit(message)
+
+    def rebuildStats(self, store):
+        stats = StatsAggregator()
+        with store.read_snapshot():
+            stats.rebuild(store.iter_sessions(), store.daily_rollups())
+            self.last_id = store.last_id()
+        self.stats = stats
+
 class SessionHistoryWidget(QWidget):
-    def __init__(self):
+    def __init__(self, store=None):
         super().__init__()
+        self.store = store or HistoryStore()
+        self.stats = StatsAggregator()
+        self._loaded = False
+        self._transfer_thread = None
+        self._transfer_worker = None
         self.initUI()
-        self._all_sessions = []
 
     def initUI(self):
         layout = QVBoxLayout(self)
         title_bar = QHBoxLayout()
         title = QLabel("Historique des séances")
         title.setFont(QFont("Segoe UI", 20, QFont.Weight.Bold))
-        title.setStyleSheet("color: #455A64; margin-bottom: 15px;")
+        title.setObjectName("historyTitle")
         title_bar.addWidget(title)
         title_bar.addStretch()
-        export_btn = IconButton(QIcon("document-save"), "Exporter l'historique", "#FDCB6E")
-        title_bar.addWidget(export_btn)
-        import_btn = IconButton(QIcon("document-open"), "Importer", "#B2BEC3")
-        title_bar.addWidget(import_btn)
+        self.export_btn = IconButton(QIcon("document-save"), "Exporter l'historique", "#FDCB6E")
+        self.export_btn.clicked.connect(self.exportHistory)
+        title_bar.addWidget(self.export_btn)
+        self.import_btn = IconButton(QIcon("document-open"), "Importer", "#B2BEC3")
+        self.import_btn.clicked.connect(self.importHistory)
+        title_bar.addWidget(self.import_btn)
         layout.addLayout(title_bar)
-        self.history_list = QListWidget()
+        transfer_bar = QHBoxLayout()
+        self.transfer_progress = QProgressBar()
+        self.transfer_progress.setRange(0, 100)
+        self.transfer_progress.hide()
+        self.transfer_cancel_btn = QPushButton("Annuler")
+        self.transfer_cancel_btn.clicked.connect(self.cancelTransfer)
+        self.transfer_cancel_btn.hide()
+        self.transfer_status = QLabel("")
+        self.transfer_status.setObjectName("transferStatus")
+        transfer_bar.addWidget(self.transfer_progress, stretch=1)
+        transfer_bar.addWidget(self.transfer_cancel_btn)
+        transfer_bar.addWidget(self.transfer_status)
+        layout.addLayout(transfer_bar)
+        self.history_model = SessionHistoryModel(self.store, self)
+        self.history_list = QListView()
+        self.history_list.setModel(self.history_model)
+        self.history_list.setUniformItemSizes(True)
         self.history_list.setAlternatingRowColors(True)
-        self.history_list.setStyleSheet("""
-            QListWidget {
-                border: none;
-                background: #F9FAFB;
-                font-size: 15px;
-                border-radius: 16px;
-            }
-            QListWidget::item:selected {
-                background: #D6EAF8;
-            }
-        """)
+        self.history_list.setObjectName("historyList")
         layout.addWidget(self.history_list, stretch=1)
         stats_bar = QHBoxLayout()
         self.total_sessions = QLabel("Total: 0")
@@ -289,64 +927,357 @@ class SessionHistoryWidget(QWidget):
         self.streak_label = QLabel("Streak: 0j")
         for l in [self.total_sessions, self.total_time, self.avg_session, self.streak_label]:
             l.setFont(QFont("Segoe UI", 12, QFont.Weight.Bold))
-            l.setStyleSheet("color: #636E72;")
+            l.setObjectName("statLabel")
             stats_bar.addWidget(l)
         stats_bar.addStretch()
         layout.addLayout(stats_bar)
 
-    def addSession(self, session_type, duration, completed_time):
-        self._all_sessions.append((session_type, duration, completed_time))
-        session_names = {"work": "Travail", "break": "Pause", "long_break": "Pause longue"}
-        icon = QIcon("clock") if session_type == "work" else QIcon("media-playback-pause")
-        duration_min = duration // 60
-        text = f"{session_names.get(session_type, 'Session')} • {duration_min}m • {completed_time.strftime('%H:%M %d/%m/%Y')}"
-        item = QListWidgetItem(icon, text)
-        self.history_list.insertItem(0, item)
+    def exportHistory(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Exporter l'historique", "historique.jsonl",
+                                              "JSON Lines (*.jsonl);;CSV (*.csv)")
+        if path:
+            self.startTransfer("export", path)
+
+    def importHistory(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Importer un historique", "",
+                                              "Historique (*.jsonl *.json *.csv)")
+        if path:
+            self.startTransfer("import", path)
+
+    def startTransfer(self, mode, path):
+        if self._transfer_thread is not None:
+            return
+        self._transfer_mode = mode
+        self._transfer_thread = QThread(self)
+        self._transfer_worker = HistoryTransferWorker(mode, self.store.path, path,
+                                                      rebuild_stats=mode == "import" and self._loaded)
+        self._transfer_worker.moveToThread(self._transfer_thread)
+        self._transfer_thread.started.connect(self._transfer_worker.run)
+        self._transfer_worker.progress.connect(self.transfer_progress.setValue)
+        self._transfer_worker.finished.connect(self.onTransferDone)
+        self._transfer_worker.failed.connect(self.onTransferDone)
+        self.transfer_progress.setValue(0)
+        self.transfer_progress.show()
+        self.transfer_cancel_btn.show()
+        self.transfer_status.setText("Export…" if mode == "export" else "Import…")
+        self.export_btn.setEnabled(False)
+        self.import_btn.setEnabled(False)
+        self._transfer_thread.start()
+
+    def cancelTransfer(self):
+        if self._transfer_worker is not None:
+            self._transfer_worker.cancel()
+
+    def onTransferDone(self, message):
+        worker = self._transfer_worker
+        self._transfer_thread.quit()
+        self._transfer_thread.wait()
+        worker.deleteLater()
+        self._transfer_thread.deleteLater()
+        self._transfer_thread = None
+        self._transfer_worker = None
+        self.transfer_progress.hide()
+        self.transfer_cancel_btn.hide()
+        self.transfer_status.setText(message)
+        self.export_btn.setEnabled(True)
+        self.import_btn.setEnabled(True)
+        if worker.stats is not None:
+            # Totaux reconstruits par le worker, complétés des séances
+            # terminées pendant l'import.
+            for _, session_type, duration, completed_at, skipped in self.store.rows_after(worker.last_id):
+                worker.stats.add(session_type, duration, completed_at, skipped)
+            self.stats = worker.stats
+            self.history_model.reload()
+            self.updateStats()
+
+    def showEvent(self, event):
+        # L'historique n'est lu qu'au premier affichage de la page.
+        if not self._loaded:
+            self.loadHistory()
+        super().showEvent(event)
+
+    def loadHistory(self):
+        self._loaded = True
+        with self.store.read_snapshot():
+            self.stats.rebuild(self.store.iter_sessions(), self.store.daily_rollups())
+        self.history_model.reload()
+        self.updateStats()
+
+    def addSession(self, session_type, duration, completed_time, skipped=False):
+        completed_at = completed_time.timestamp()
+        self.store.add(session_type, duration, completed_at, skipped)
+        if not self._loaded:
+            return
+        self.stats.add(session_type, duration, completed_at, skipped)
+        self.history_model.prependSession()
         self.updateStats()
 
     def updateStats(self):
-        count = sum(1 for s in self._all_sessions if s[0]=="work")
-        self.total_sessions.setText(f"Total: {count}")
-        total_minutes = sum(d//60 for (tp, d, _) in self._all_sessions if tp=="work")
-        hours = total_minutes // 60
-        minutes = total_minutes % 60
+        stats = self.stats
+        self.total_sessions.setText(f"Total: {stats.count}")
+        hours = stats.total_minutes // 60
+        minutes = stats.total_minutes % 60
         self.total_time.setText(f"Total temps: {hours}h {minutes}m")
-        self.avg_session.setText(f"Moyenne: {total_minutes//count if count else 0}m")
+        self.avg_session.setText(f"Moyenne: {stats.average}m")
+        self.streak_label.setText(f"Streak: {stats.current_streak()}j")
+        self.streak_label.setToolTip(f"Record : {stats.longest_streak}j")
+
+# --------- STATISTIQUES ---------
+class AnalyticsLoader(QObject):
+    # Premier chargement de tout l'historique, ou intégration d'un gros lot
+    # de séances (import) dans analytics, hors du thread de l'interface.
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, store_path, analytics=None):
+        super().__init__()
+        self.store_path = store_path
+        self.analytics = analytics
+
+    def run(self):
+        store = HistoryStore(self.store_path)
+        analytics = self.analytics or Analytics()
+        try:
+            analytics.refresh(store)
+        except Exception as e:
+            self.failed.emit(f"Statistiques indisponibles : {e}")
+            return
+        finally:
+            store.close()
+        self.loaded.emit(analytics)
+
+class HeatmapWidget(QWidget):
+    # Séances de travail par heure (colonnes) et jour de la semaine (lignes).
+    DAYS = ["Lun", "Mar", "Mer", "Jeu", "Ven", "Sam", "Dim"]
+    CELL = 22
+    MARGIN_LEFT = 40
+    MARGIN_TOP = 18
+
+    def __init__(self, color="#4ECDC4"):
+        super().__init__()
+        self.color = QColor(color)
+        self.counts = [0] * (7 * 24)
+        self.setFixedSize(self.MARGIN_LEFT + 24 * self.CELL, self.MARGIN_TOP + 7 * self.CELL)
+
+    def setCounts(self, counts):
+        self.counts = list(counts)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setFont(QFont("Segoe UI", 8))
+        painter.setPen(QColor("#7F8C8D"))
+        cell = self.CELL
+        for hour in range(0, 24, 3):
+            painter.drawText(QRectF(self.MARGIN_LEFT + hour * cell, 0, cell * 2, self.MARGIN_TOP),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, f"{hour}h")
+        peak = max(self.counts) or 1
+        for day in range(7):
+            y = self.MARGIN_TOP + day * cell
+            painter.setPen(QColor("#7F8C8D"))
+            painter.drawText(QRectF(0, y, self.MARGIN_LEFT - 6, cell),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, self.DAYS[day])
+            painter.setPen(Qt.PenStyle.NoPen)
+            for hour in range(24):
+                color = QColor(self.color)
+                color.setAlphaF(0.08 + 0.92 * self.counts[day * 24 + hour] / peak)
+                painter.setBrush(color)
+                painter.drawRoundedRect(QRectF(self.MARGIN_LEFT + hour * cell + 1, y + 1, cell - 2, cell - 2), 4, 4)
+        painter.end()
+
+class TrendWidget(QWidget):
+    # Minutes de travail par jour (barres) et moyenne glissante (courbe).
+    def __init__(self, color="#4ECDC4", line_color="#FF6B6B"):
+        super().__init__()
+        self.color = QColor(color)
+        self.line_color = QColor(line_color)
+        self.daily = []
+        self.rolling = []
+        self.setMinimumHeight(150)
+
+    def setSeries(self, daily, rolling):
+        self.daily = list(daily)
+        self.rolling = list(rolling)
+        self.update()
+
+    def paintEvent(self, event):
+        if not self.daily:
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        rect = QRectF(self.rect()).adjusted(4, 8, -4, -4)
+        peak = max(max(self.daily), max(self.rolling, default=0)) or 1
+        step = rect.width() / len(self.daily)
+        painter.setPen(Qt.PenStyle.NoPen)
+        bar_color = QColor(self.color)
+        bar_color.setAlphaF(0.45)
+        painter.setBrush(bar_color)
+        for i, minutes in enumerate(self.daily):
+            height = rect.height() * minutes / peak
+            painter.drawRect(QRectF(rect.left() + i * step, rect.bottom() - height, max(1.0, step - 1), height))
+        path = QPainterPath()
+        for i, average in enumerate(self.rolling):
+            point = QPointF(rect.left() + (i + 0.5) * step, rect.bottom() - rect.height() * average / peak)
+            if i == 0:
+                path.moveTo(point)
+            else:
+                path.lineTo(point)
+        painter.setPen(QPen(self.line_color, 2))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawPath(path)
+        painter.end()
+
+class StatisticsWidget(QWidget):
+    TREND_DAYS = 90
+    # Au-delà, les nouvelles séances sont intégrées par AnalyticsLoader.
+    INLINE_ROWS = 500
+
+    def __init__(self, store=None, settings=None):
+        super().__init__()
+        self.store = store or HistoryStore()
+        self.settings = settings if settings is not None else dict(DEFAULT_SETTINGS)
+        self.analytics = None
+        self._loader_thread = None
+        self._shown_version = None
+        self.initUI()
+
+    def initUI(self):
+        layout = QVBoxLayout(self)
+        title = QLabel("Statistiques")
+        title.setFont(QFont("Segoe UI", 20, QFont.Weight.Bold))
+        title.setObjectName("statsTitle")
+        layout.addWidget(title)
+        stats_grid = QGridLayout()
+        self.completion_label = QLabel("Séances terminées : –")
+        self.average_label = QLabel("Moyenne : –")
+        self.ratio_label = QLabel("Pauses / travail : –")
+        self.long_break_label = QLabel("Pauses longues : –")
+        for i, l in enumerate([self.completion_label, self.average_label, self.ratio_label, self.long_break_label]):
+            l.setFont(QFont("Segoe UI", 11, QFont.Weight.Bold))
+            l.setObjectName("statLabel")
+            stats_grid.addWidget(l, i // 2, i % 2)
+        layout.addLayout(stats_grid)
+        layout.addWidget(self.sectionLabel("Séances de travail par heure et par jour"))
+        self.heatmap = HeatmapWidget()
+        layout.addWidget(self.heatmap, alignment=Qt.AlignmentFlag.AlignHCenter)
+        layout.addWidget(self.sectionLabel(f"Minutes de travail, {self.TREND_DAYS} derniers jours (moyenne sur 7 jours)"))
+        self.trend = TrendWidget()
+        layout.addWidget(self.trend, stretch=1)
+
+    def sectionLabel(self, text):
+        label = QLabel(text)
+        label.setObjectName("statLabel")
+        return label
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+
+    def sessionAdded(self):
+        if self.isVisible():
+            self.refresh()
+
+    def refresh(self):
+        if self._loader_thread is not None:
+            return  # onLoaded rafraîchit à nouveau
+        if self.analytics is None:
+            self.startLoading()
+            return
+        try:
+            if self.store.count_after(self.analytics.last_id) > self.INLINE_ROWS:
+                self.startLoading(self.analytics)
+                return
+            self.analytics.refresh(self.store)
+        except Exception as e:
+            # Base verrouillée ou illisible : nouvel essai au prochain affichage.
+            self.completion_label.setText(f"Statistiques indisponibles : {e}")
+            return
+        self.updateView()
+
+    def startLoading(self, analytics=None):
+        # Le thread de l'interface ne touche plus à analytics avant onLoaded
+        # ou onLoadFailed.
+        if self._loader_thread is not None:
+            return
+        self.completion_label.setText("Calcul…")
+        self._loader_thread = QThread(self)
+        self._loader = AnalyticsLoader(self.store.path, analytics)
+        self._loader.moveToThread(self._loader_thread)
+        self._loader_thread.started.connect(self._loader.run)
+        self._loader.loaded.connect(self.onLoaded)
+        self._loader.failed.connect(self.onLoadFailed)
+        self._loader_thread.start()
+
+    def stopLoader(self):
+        self._loader_thread.quit()
+        self._loader_thread.wait()
+        self._loader.deleteLater()
+        self._loader_thread.deleteLater()
+        self._loader_thread = None
+        self._loader = None
+
+    def onLoaded(self, analytics):
+        self.stopLoader()
+        self.analytics = analytics
+        # Séances ajoutées pendant le chargement.
+        self.refresh()
+
+    def onLoadFailed(self, message):
+        # Agrégats peut-être incomplets : le prochain affichage relance un
+        # chargement complet.
+        self.stopLoader()
+        self.analytics = None
+        self._shown_version = None
+        self.completion_label.setText(message)
+
+    @timed("stats.update_view")
+    def updateView(self):
+        analytics = self.analytics
+        key = (analytics.version, tuple(sorted(self.settings.items())))
+        if key == self._shown_version:
+            return
+        self._shown_version = key
+        summary = analytics.summary(self.settings)
+        percent = lambda value: "–" if value is None else f"{value:.0%}"
+        self.completion_label.setText(f"Séances terminées : {percent(summary['completion_ratio'])}")
+        self.average_label.setText(f"Moyenne : {summary['average_7d']:.0f} min/j (7 j), "
+                                   f"{summary['average_30d']:.0f} (30 j)")
+        self.ratio_label.setText(f"Pauses / travail : {percent(summary['break_work_ratio'])} "
+                                 f"(prévu {percent(summary['planned_break_work_ratio'])})")
+        self.long_break_label.setText(f"Pauses longues : {percent(summary['long_break_share'])} "
+                                      f"(prévu {percent(summary['planned_long_break_share'])})")
+        self.heatmap.setCounts(analytics.heatmap)
+        self.trend.setSeries(analytics.daily_minutes(self.TREND_DAYS),
+                             analytics.rolling_average(7, self.TREND_DAYS))
 
 # --------- PARAMÈTRES ---------
 class SettingsWidget(QWidget):
+    # N'émet que les clés modifiées, une fois la rafale de changements
+    # (flèche de spinbox maintenue, clics successifs) terminée.
     settingsChanged = pyqtSignal(dict)
+    DEBOUNCE_MS = 250
 
-    def __init__(self):
+    def __init__(self, settings=None):
         super().__init__()
-        self.settings = {
-            "work_duration": 25,
-            "break_duration": 5,
-            "long_break_duration": 15,
-            "sessions_until_long_break": 4,
-            "auto_start_breaks": False,
-            "auto_start_work": False,
-            "theme": "modern",
-            "notifications": True,
-            "sound_enabled": True,
-            "mode_zen": False
-        }
+        self.settings = dict(DEFAULT_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(self.DEBOUNCE_MS)
+        self._debounce.timeout.connect(self.flush)
         self.initUI()
 
     def initUI(self):
-        self.setStyleSheet("""QScrollArea{ background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #F8F9FA, stop:1 #E9ECEF); }
-                            QWidget{ background: transparent; }
-                            QLayout{ background: transparent; }
-                            QVBoxLayout{ background: transparent; }
-                           """)
+        self.setObjectName("settingsPage")
         layout = QVBoxLayout(self)
         title = QLabel("Paramètres")
         title.setFont(QFont("Segoe UI", 20, QFont.Weight.Bold))
-        title.setStyleSheet("color: #2C3E50; margin-bottom: 20px;")
+        title.setObjectName("settingsTitle")
         layout.addWidget(title)
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
-        scroll.setStyleSheet("QScrollArea{border:none; background: transparent;}")
+        scroll.setObjectName("settingsScroll")
         settings_widget = QWidget()
         settings_layout = QVBoxLayout(settings_widget)
         time_group = self.createGroup("Durées (minutes)")
@@ -390,16 +1321,34 @@ class SettingsWidget(QWidget):
         self.zen_cb = QCheckBox("Mode Zen (désactive les sons, animations, couleurs douces)")
         self.zen_cb.setChecked(self.settings.get("mode_zen", False))
         self.zen_cb.toggled.connect(self.updateSettings)
-        for cb in [self.auto_start_breaks_cb, self.auto_start_work_cb, self.notifications_cb, self.sound_cb, self.zen_cb]:
+        self.tray_cb = QCheckBox("Réduire dans la zone de notification")
+        self.tray_cb.setChecked(self.settings["minimize_to_tray"])
+        self.tray_cb.setEnabled(QSystemTrayIcon.isSystemTrayAvailable())
+        self.tray_cb.toggled.connect(self.updateSettings)
+        for cb in [self.auto_start_breaks_cb, self.auto_start_work_cb, self.notifications_cb, self.sound_cb,
+                   self.zen_cb, self.tray_cb]:
             behavior_layout.addWidget(cb)
         behavior_group.setLayout(behavior_layout)
         settings_layout.addWidget(behavior_group)
+        history_group = self.createGroup("Historique")
+        history_layout = QFormLayout()
+        self.retention_spin = QSpinBox()
+        self.retention_spin.setRange(0, 120)
+        self.retention_spin.setSpecialValueText("Tout garder")
+        self.retention_spin.setSuffix(" mois")
+        self.retention_spin.setToolTip("Au-delà, les séances sont regroupées en totaux journaliers")
+        self.retention_spin.setValue(self.settings["retention_months"])
+        self.retention_spin.valueChanged.connect(self.updateSettings)
+        history_layout.addRow("Détail conservé:", self.retention_spin)
+        history_group.setLayout(history_layout)
+        settings_layout.addWidget(history_group)
         theme_group = self.createGroup("Thème")
         theme_layout = QVBoxLayout()
         self.theme_combo = QComboBox()
-        self.theme_combo.addItems(["modern", "forest", "sunset", "ocean", "dark", "zen"])
-        self.theme_combo.setCurrentText(self.settings["theme"])
-        self.theme_combo.currentTextChanged.connect(self.updateSettings)
+        for name in THEMES.names():
+            self.theme_combo.addItem(THEMES.label(name), name)
+        self.theme_combo.setCurrentIndex(max(0, self.theme_combo.findData(self.settings["theme"])))
+        self.theme_combo.currentIndexChanged.connect(self.updateSettings)
         theme_layout.addWidget(QLabel("Sélectionner un thème:"))
         theme_layout.addWidget(self.theme_combo)
         theme_group.setLayout(theme_layout)
@@ -410,47 +1359,363 @@ class SettingsWidget(QWidget):
 
     def createGroup(self, title):
         group = QGroupBox(title)
-        group.setStyleSheet("""
-            QGroupBox {
-                font-weight: bold; color: #2C3E50; border: 2px solid #CCC; border-radius: 12px; margin-top: 12px; padding-top: 12px; 
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #F8F9FA, stop:1 #E9ECEF);
-            }
-            QGroupBox::title { left: 10px; color: #2C3E50;}
-            QLabel { color: #2C3E50; }
-            QCheckBox { color: #2C3E50; font-size: 14px; }
-            QSpinBox, QLineEdit { background: #fff; border: 1px solid #CCC; border-radius: 8px; padding: 6px; font-size: 14px; color: #2C3E50; }
-            QComboBox { background: #fff; border: 1px solid #CCC; border-radius: 8px; padding: 6px; font-size: 14px; color: #2C3E50; }
-        """)
+        group.setObjectName("settingsGroup")
         return group
 
     def updateSettings(self):
-        self.settings.update({
+        self._debounce.start()
+
+    def currentValues(self):
+        return {
             "work_duration": self.work_spin.value(),
             "break_duration": self.break_spin.value(),
             "long_break_duration": self.long_break_spin.value(),
             "sessions_until_long_break": self.sessions_spin.value(),
             "auto_start_breaks": self.auto_start_breaks_cb.isChecked(),
             "auto_start_work": self.auto_start_work_cb.isChecked(),
-            "theme": self.theme_combo.currentText(),
+            "theme": self.theme_combo.currentData(),
             "notifications": self.notifications_cb.isChecked(),
             "sound_enabled": self.sound_cb.isChecked(),
-            "mode_zen": self.zen_cb.isChecked()
-        })
-        self.settingsChanged.emit(self.settings)
+            "mode_zen": self.zen_cb.isChecked(),
+            "minimize_to_tray": self.tray_cb.isChecked(),
+            "retention_months": self.retention_spin.value()
+        }
+
+    def flush(self):
+        self._debounce.stop()
+        changes = diff_settings(self.settings, self.currentValues())
+        if changes:
+            self.settings.update(changes)
+            if METRICS.enabled:
+                METRICS.count("settings.changed")
+            self.settingsChanged.emit(changes)
+
+# --------- CONTRÔLE ---------
+class ControlBridge(QObject):
+    # Exécute dans le thread Qt les commandes reçues par le serveur de
+    # contrôle, qui tourne dans son propre thread asyncio. actions : commandes
+    # propres à l'interface ("show"), les autres sont des méthodes du moteur.
+    requested = pyqtSignal(str, object)
+
+    def __init__(self, engine, actions=None):
+        super().__init__()
+        self.engine = engine
+        self.actions = actions or {}
+        self.requested.connect(self._execute, Qt.ConnectionType.QueuedConnection)
+
+    def dispatch(self, cmd):
+        future = Future()
+        self.requested.emit(cmd, future)
+        return future
+
+    def _execute(self, cmd, future):
+        try:
+            action = self.actions.get(cmd) or getattr(self.engine, cmd)
+            action()
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(self.engine.status())
+
+# --------- MÉTRIQUES ---------
+class MetricsOverlay(QLabel):
+    # Panneau de débogage superposé à la fenêtre ; rafraîchi une fois par
+    # seconde, uniquement lorsqu'il est visible.
+    REFRESH_MS = 1000
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setObjectName("metricsOverlay")
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self._refresh = QTimer(self)
+        self._refresh.setInterval(self.REFRESH_MS)
+        self._refresh.timeout.connect(self.refresh)
+        self.hide()
+
+    def setActive(self, active):
+        if active:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self._refresh.start()
+        else:
+            self._refresh.stop()
+            self.hide()
+
+    def refresh(self):
+        lines = METRICS.lines() or ["(aucune mesure pour l'instant)"]
+        self.setText("\n".join(lines))
+        self.adjustSize()
+
+# --------- SONS & NOTIFICATIONS ---------
+# Signaux de fin de séance synthétisés une fois (deux notes amorties), écrits
+# en WAV dans le répertoire de données puis décodés en mémoire par QSoundEffect.
+SAMPLE_RATE = 22050
+CHIMES = {"work": (659.25, 523.25), "break": (523.25, 783.99)}
+
+def _chimePath(name):
+    path = os.path.join(user_data_dir(), "sounds", f"{name}-1.wav")
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    samples = array("h")
+    n = int(0.22 * SAMPLE_RATE)
+    for freq in CHIMES[name]:
+        w = 2 * math.pi * freq / SAMPLE_RATE
+        samples.extend(int(12000 * math.exp(-5 * i / n) * math.sin(w * i)) for i in range(n))
+    if sys.byteorder == "big":
+        samples.byteswap()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with wave.open(tmp, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+    os.replace(tmp, path)
+    return path
+
+def _loadSoundEffects(parent):
+    # QtMultimedia est facultatif : sans lui, play() se rabat sur le bip système.
+    try:
+        from PyQt6.QtMultimedia import QSoundEffect
+    except ImportError:
+        return {}
+    effects = {}
+    for name in CHIMES:
+        try:
+            path = _chimePath(name)
+        except OSError as e:
+            print(f"Son indisponible : {e}")
+            continue
+        effect = QSoundEffect(parent)
+        effect.setSource(QUrl.fromLocalFile(path))
+        effect.setVolume(0.6)
+        effects[name] = effect
+    return effects
+
+def _appleScriptString(text):
+    # Chaîne AppleScript : seuls la barre oblique inverse et le guillemet
+    # s'échappent, les accents passent tels quels.
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def _notifyCommand(title, body):
+    if sys.platform == "darwin":
+        return ["osascript", "-e",
+                f"display notification {_appleScriptString(body)} with title {_appleScriptString(title)}"]
+    if shutil.which("notify-send"):
+        return ["notify-send", "--app-name=Pomodoro Pro Ultra", title, body]
+    return None
+
+class NotificationWorker(QObject):
+    # Exécuté dans son propre QThread : un démon de notification lent ne
+    # bloque ni le minuteur ni le rendu.
+    TIMEOUT_S = 5
+
+    def send(self, command):
+        try:
+            subprocess.run(command, timeout=self.TIMEOUT_S, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Notification non envoyée : {e}")
+
+class Notifier(QObject):
+    """Son et notification de bureau en fin de séance. Rien n'est chargé ni
+    démarré tant que les réglages correspondants sont désactivés."""
+    requested = pyqtSignal(list)
+    SESSION_NAMES = {"work": "Séance de travail", "break": "Pause courte", "long_break": "Pause longue"}
+    MESSAGE_MS = 8000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sound = False
+        self.desktop = False
+        self.tray = None
+        self._message_tray = None
+        self._ready = False
+        self._effects = None
+        self._thread = None
+
+    def configure(self, settings):
+        # Le mode Zen coupe les sons, pas les notifications.
+        self.sound = settings["sound_enabled"] and not settings["mode_zen"]
+        self.desktop = settings["notifications"]
+        if self._ready:
+            self.preload()
+
+    def preload(self):
+        # Appelé après le premier affichage : le décodage ne retarde pas le démarrage.
+        self._ready = True
+        if self.sound and self._effects is None:
+            self._effects = _loadSoundEffects(self)
+
+    def sessionCompleted(self, session_type, next_session, next_minutes):
+        if not (self.sound or self.desktop):
+            return
+        if self.sound:
+            self.play("work" if session_type == "work" else "break")
+        if self.desktop:
+            title = f"{self.SESSION_NAMES[session_type]} terminée"
+            self.notify(title, f"Suivant : {self.SESSION_NAMES[next_session].lower()} ({next_minutes} min)")
+
+    def play(self, name):
+        if self._effects is None:
+            self.preload()
+        effect = self._effects.get(name)
+        if effect is not None and effect.status() == effect.Status.Ready:
+            effect.play()
+        else:
+            QApplication.beep()
+
+    def notify(self, title, body):
+        command = _notifyCommand(title, body)
+        if command is None:
+            self.trayMessage(title, body)
+            return
+        if self._thread is None:
+            self._thread = QThread(self)
+            self._worker = NotificationWorker()
+            self._worker.moveToThread(self._thread)
+            self.requested.connect(self._worker.send)
+            self._thread.start()
+        self.requested.emit(command)
+
+    def trayMessage(self, title, body):
+        # Ni notify-send ni osascript (Windows, Linux minimal) : bulle de la
+        # zone de notification, via une icône temporaire hors du mode réduit.
+        if self.tray is not None and self.tray.isVisible():
+            self.tray.showMessage(title, body, msecs=self.MESSAGE_MS)
+            return
+        if not QSystemTrayIcon.isSystemTrayAvailable():
+            return
+        if self._message_tray is None:
+            self._message_tray = QSystemTrayIcon(_trayFrames(THEMES.resolve(DEFAULT_THEME), "work")[TRAY_FRAMES], self)
+            self._message_tray.messageClicked.connect(self._message_tray.hide)
+        self._message_tray.show()
+        self._message_tray.showMessage(title, body, msecs=self.MESSAGE_MS)
+        QTimer.singleShot(self.MESSAGE_MS, self._message_tray.hide)
+
+    def shutdown(self):
+        if self._message_tray is not None:
+            self._message_tray.hide()
+        if self._thread is not None:
+            self._thread.quit()
+            self._thread.wait((NotificationWorker.TIMEOUT_S + 1) * 1000)
+            self._thread = None
+
+# --------- ZONE DE NOTIFICATION ---------
+# L'icône ne montre que TRAY_FRAMES pas de progression : les images sont
+# rendues une fois par thème et type de séance, puis réutilisées.
+TRAY_FRAMES = 60
+TRAY_ICON_SIZE = 64
+_tray_frame_cache = {}
+
+def _trayFrames(theme, session_type):
+    key = (theme.name, session_type)
+    frames = _tray_frame_cache.get(key)
+    if frames is None:
+        color = theme.arc_colors[session_type]
+        frames = [_renderTrayFrame(color, i / TRAY_FRAMES) for i in range(TRAY_FRAMES + 1)]
+        _tray_frame_cache[key] = frames
+    return frames
+
+def _renderTrayFrame(color, progress):
+    size = TRAY_ICON_SIZE
+    pixmap = QPixmap(size, size)
+    pixmap.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(Qt.PenStyle.NoPen)
+    painter.setBrush(QColor("#f8fafc"))
+    painter.drawEllipse(2, 2, size - 4, size - 4)
+    painter.setBrush(Qt.BrushStyle.NoBrush)
+    painter.setPen(QPen(QColor("#d5dbe1"), 8))
+    painter.drawEllipse(9, 9, size - 18, size - 18)
+    if progress > 0:
+        painter.setPen(QPen(color, 8, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap))
+        painter.drawArc(9, 9, size - 18, size - 18, 90 * 16, -int(progress * 360 * 16))
+    painter.end()
+    return QIcon(pixmap)
+
+class TrayIcon(QSystemTrayIcon):
+    # setIcon n'est appelé que lorsque l'image affichée change réellement.
+    def __init__(self, parent):
+        super().__init__(parent)
+        self._shown = None
+        menu = QMenu(parent)
+        self.show_action = menu.addAction("Afficher")
+        self.toggle_action = menu.addAction("Démarrer")
+        self.skip_action = menu.addAction("Passer")
+        menu.addSeparator()
+        self.quit_action = menu.addAction("Quitter")
+        self.setContextMenu(menu)
+
+    def setState(self, theme, session_type, progress, remaining, label):
+        frame = min(TRAY_FRAMES, max(0, int(progress * TRAY_FRAMES + 1e-6)))
+        shown = (theme.name, session_type, frame)
+        if shown != self._shown:
+            self._shown = shown
+            self.setIcon(_trayFrames(theme, session_type)[frame])
+        self.setToolTip(f"{label} — {remaining // 60:02d}:{remaining % 60:02d}")
 
 # --------- MAIN APP ---------
 class PomodoroApp(QMainWindow):
+    SAVE_DELAY_MS = 1000
+
     def __init__(self):
         super().__init__()
-        self.timer = PomodoroTimer()
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.settings_store = SettingsStore()
+        self.engine = SessionEngine(self.settings)
+        self.history_store = HistoryStore()
+        self.settings_widget = None
+        self.history_widget = None
+        self.statistics_widget = None
+        self.control_server = None
+        self.tray = None
+        self.tray_mode = False
+        self.notifier = Notifier(self)
+        self.timer = PomodoroTimer(self.engine)
         self.timer.timeChanged.connect(self.updateDisplay)
-        self.timer.sessionCompleted.connect(self.onSessionCompleted)
-        self.current_session = "work"
-        self.session_count = 0
-        self.is_running = False
+        self.engine.subscribe(self.onEngineEvent)
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(self.SAVE_DELAY_MS)
+        self._save_timer.timeout.connect(self.saveSettings)
+        self._metrics_enabled_at_launch = METRICS.enabled
+        self._metrics_path, interval = dump_settings()
+        if self._metrics_path:
+            self._metrics_timer = QTimer(self)
+            self._metrics_timer.timeout.connect(self.dumpMetrics)
+            self._metrics_timer.start(int(interval * 1000))
+        self.setObjectName("pomodoroApp")
+        StyleEngine.apply(self.engine.settings["theme"], self.engine.settings["mode_zen"])
         self.initUI()
+        STARTUP.mark("widgets")
         self.loadSettings()
+        # Reprend la séance en cours si l'application a été interrompue. Si
+        # une autre instance (démon sans interface) tient la socket, le
+        # journal est le sien : l'interface tourne alors sans journal.
+        self.journal = None
+        if held():
+            print("Une autre instance tient la séance en cours : l'interface démarre sans la reprendre.")
+        else:
+            self.journal = SessionJournal()
+            self.journal.attach(self.engine)
+        STARTUP.mark("settings")
         self.setWindowTitle("🍅 Pomodoro Pro Ultra")
+        if not STARTUP.finished:
+            self.progress_widget.installEventFilter(self)
+
+    @property
+    def current_session(self):
+        return self.engine.current_session
+
+    @property
+    def session_count(self):
+        return self.engine.session_count
+
+    @property
+    def is_running(self):
+        return self.engine.is_running
 
     def initUI(self):
         self.setFixedSize(900, 680)
@@ -463,32 +1728,88 @@ class PomodoroApp(QMainWindow):
         self.stacked_widget = QStackedWidget()
         self.timer_widget = self.createTimerWidget()
         self.stacked_widget.addWidget(self.timer_widget)
-        self.settings_widget = SettingsWidget()
-        self.settings_widget.settingsChanged.connect(self.applySettings)
-        self.stacked_widget.addWidget(self.settings_widget)
-        self.history_widget = SessionHistoryWidget()
-        self.stacked_widget.addWidget(self.history_widget)
+        # Les pages Paramètres et Historique sont construites à leur première
+        # ouverture ; d'ici là, un widget vide occupe leur place.
+        self._page_factories = {1: self.createSettingsPage, 2: self.createHistoryPage,
+                                3: self.createStatisticsPage}
+        self.stacked_widget.addWidget(QWidget())
+        self.stacked_widget.addWidget(QWidget())
+        self.stacked_widget.addWidget(QWidget())
         main_layout.addWidget(self.stacked_widget)
-        self.setStyleSheet("""
-            QMainWindow { 
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #F8F9FA, stop:1 #E9ECEF);
-            }
-        """)
+        self.metrics_overlay = MetricsOverlay(central_widget)
+        self.metrics_overlay.move(12, 74)
+
+    def createSettingsPage(self):
+        self.settings_widget = SettingsWidget(self.settings)
+        self.settings_widget.settingsChanged.connect(self.applySettings)
+        return self.settings_widget
+
+    def createHistoryPage(self):
+        self.history_widget = SessionHistoryWidget(self.history_store)
+        return self.history_widget
+
+    def createStatisticsPage(self):
+        self.statistics_widget = StatisticsWidget(self.history_store, self.settings)
+        return self.statistics_widget
+
+    def ensurePage(self, idx):
+        factory = self._page_factories.pop(idx, None)
+        if factory is None:
+            return
+        placeholder = self.stacked_widget.widget(idx)
+        self.stacked_widget.insertWidget(idx, factory())
+        self.stacked_widget.removeWidget(placeholder)
+        placeholder.deleteLater()
+
+    def eventFilter(self, obj, event):
+        if obj is self.progress_widget and event.type() == QEvent.Type.Paint:
+            self.progress_widget.removeEventFilter(self)
+            QTimer.singleShot(0, STARTUP.finish)
+            QTimer.singleShot(0, self.startControlServer)
+            QTimer.singleShot(0, self.notifier.preload)
+            QTimer.singleShot(0, self.applyRetention)
+        return False
+
+    def startControlServer(self):
+        # Démarré après le premier affichage : asyncio ne pèse pas sur le
+        # démarrage. POMODORO_CONTROL=0 le désactive.
+        if self.control_server is not None or os.environ.get("POMODORO_CONTROL") == "0":
+            return
+        from pomodoro_control import ControlServer, supported
+        if not supported():
+            return
+        self.control_bridge = ControlBridge(self.engine, {"show": self.bringToFront})
+        server = ControlServer(self.control_bridge.dispatch, commands=GUI_ACTIONS)
+        server.publish("status", {}, self.engine.status(), self.engine.countdown.deadline)
+        try:
+            server.start_thread()
+        except OSError as e:
+            # Deux lancements quasi simultanés : le second laisse la place.
+            if e.errno == errno.EADDRINUSE and shown(forward("show")):
+                QTimer.singleShot(0, self.close)
+                return
+            print(f"Interface de contrôle indisponible : {e}")
+            return
+        self.control_server = server
+
+    def bringToFront(self):
+        if self.tray_mode:
+            self.leaveTrayMode()
+            return
+        if self.isMinimized():
+            self.showNormal()
+        self.raise_()
+        self.activateWindow()
 
     def createNavigationBar(self):
         nav_widget = QWidget()
         nav_widget.setFixedHeight(62)
-        nav_widget.setStyleSheet("""
-            QWidget { 
-                background: #fff; 
-                border-bottom: 1.5px solid #E9ECEF;
-            }
-        """)
+        nav_widget.setObjectName("navBar")
         layout = QHBoxLayout(nav_widget)
         layout.setContentsMargins(22, 0, 22, 0)
         title = QLabel("🍅 Pomodoro Pro Ultra")
         title.setFont(QFont("Segoe UI", 18, QFont.Weight.Bold))
-        title.setStyleSheet("color: #2C3E50; letter-spacing:1.8px;")
+        title.setObjectName("appTitle")
         layout.addWidget(title)
         layout.addStretch()
         self.nav_buttons = {}
@@ -498,32 +1819,18 @@ class PomodoroApp(QMainWindow):
         history_btn = QPushButton("Historique")
         history_btn.clicked.connect(lambda: self.switchView(2))
         self.nav_buttons["history"] = history_btn
+        stats_btn = QPushButton("Stats")
+        stats_btn.setToolTip("Statistiques")
+        stats_btn.clicked.connect(lambda: self.switchView(3))
+        self.nav_buttons["stats"] = stats_btn
         settings_btn = QPushButton("Paramètres")
         settings_btn.clicked.connect(lambda: self.switchView(1))
         self.nav_buttons["settings"] = settings_btn
         menu_btn = QPushButton("Menu")
         menu_btn.clicked.connect(self.showMenuPopup)
         self.nav_buttons["menu"] = menu_btn
-        for btn in [timer_btn, history_btn, settings_btn, menu_btn]:
-            btn.setStyleSheet("""
-                QPushButton {
-                    background: transparent; 
-                    border: none; 
-                    color: #7F8C8D; 
-                    font-size: 15px; 
-                    font-weight: bold;
-                    padding: 12px 18px; 
-                    border-radius: 10px;
-                }
-                QPushButton:hover { 
-                    background: #F1F2F6; 
-                    color: #2C3E50;
-                }
-                QPushButton:checked { 
-                    background: #4ECDC4; 
-                    color: white;
-                }
-            """)
+        for btn in [timer_btn, history_btn, stats_btn, settings_btn, menu_btn]:
+            btn.setObjectName("navButton")
             btn.setCheckable(True)
             layout.addWidget(btn)
         timer_btn.setChecked(True)
@@ -553,23 +1860,25 @@ class PomodoroApp(QMainWindow):
         layout.addLayout(controls_layout)
         self.session_info = QLabel("Prêt à commencer")
         self.session_info.setFont(QFont("Segoe UI", 15, QFont.Weight.Bold))
-        self.session_info.setStyleSheet("color: #7F8C8D; margin-top: 10px; letter-spacing:1.2px;")
+        self.session_info.setObjectName("sessionInfo")
         self.session_info.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.session_info)
         self.focus_label = QLabel("")
         self.focus_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.focus_label.setFont(QFont("Segoe UI", 13, QFont.Weight.Bold))
-        self.focus_label.setStyleSheet("color:#95A5A6;")
+        self.focus_label.setObjectName("focusLabel")
         layout.addWidget(self.focus_label)
         return widget
 
     def switchView(self, idx):
+        self.ensurePage(idx)
         self.stacked_widget.setCurrentIndex(idx)
         for k, btn in self.nav_buttons.items():
             btn.setChecked(False)
         if idx == 0: self.nav_buttons["timer"].setChecked(True)
         elif idx == 1: self.nav_buttons["settings"].setChecked(True)
         elif idx == 2: self.nav_buttons["history"].setChecked(True)
+        elif idx == 3: self.nav_buttons["stats"].setChecked(True)
 
     def showMenuPopup(self):
         menu = QMenu()
@@ -579,11 +1888,16 @@ class PomodoroApp(QMainWindow):
         act2.triggered.connect(self.toggleFocusMode)
         act3 = QAction("Mode Zen", self)
         act3.triggered.connect(self.toggleZenMode)
+        act_metrics = QAction("Métriques", self)
+        act_metrics.setCheckable(True)
+        act_metrics.setChecked(self.metrics_overlay.isVisible())
+        act_metrics.triggered.connect(self.toggleMetricsOverlay)
         act4 = QAction("Quitter", self)
         act4.triggered.connect(self.close)
         menu.addAction(act1)
         menu.addAction(act2)
         menu.addAction(act3)
+        menu.addAction(act_metrics)
         menu.addSeparator()
         menu.addAction(act4)
         menu.exec(self.mapToGlobal(self.nav_buttons["menu"].pos() + QPoint(60, 50)))
@@ -600,76 +1914,164 @@ class PomodoroApp(QMainWindow):
         QTimer.singleShot(7000, lambda: self.focus_label.setText(""))
 
     def toggleZenMode(self):
-        s = self.settings_widget.settings
-        s["mode_zen"] = not s["mode_zen"]
-        self.settings_widget.zen_cb.setChecked(s["mode_zen"])
-        self.applySettings(s)
+        zen = not self.settings["mode_zen"]
+        if self.settings_widget is not None:
+            self.settings_widget.settings["mode_zen"] = zen
+            self.settings_widget.zen_cb.setChecked(zen)
+        self.applySettings({"mode_zen": zen})
+
+    def toggleMetricsOverlay(self):
+        # L'overlay active la collecte le temps de son affichage, sauf si
+        # elle a été demandée dès le lancement (POMODORO_METRICS).
+        visible = not self.metrics_overlay.isVisible()
+        METRICS.enabled = visible or self._metrics_enabled_at_launch
+        self.metrics_overlay.setActive(visible)
+
+    def dumpMetrics(self):
+        try:
+            METRICS.dump(self._metrics_path)
+        except OSError as e:
+            print(f"Erreur lors de l'écriture des métriques : {e}")
+
+    # --- zone de notification ---
+    def changeEvent(self, event):
+        if (event.type() == QEvent.Type.WindowStateChange and self.isMinimized() and not self.tray_mode
+                and self.settings["minimize_to_tray"] and QSystemTrayIcon.isSystemTrayAvailable()):
+            QTimer.singleShot(0, self.enterTrayMode)
+        super().changeEvent(event)
+
+    def ensureTray(self):
+        if self.tray is None:
+            self.tray = TrayIcon(self)
+            self.notifier.tray = self.tray
+            self.tray.show_action.triggered.connect(self.leaveTrayMode)
+            self.tray.toggle_action.triggered.connect(self.toggleTimer)
+            self.tray.skip_action.triggered.connect(self.skipSession)
+            self.tray.quit_action.triggered.connect(self.quitFromTray)
+            self.tray.activated.connect(self.onTrayActivated)
+        return self.tray
+
+    def enterTrayMode(self):
+        # Fenêtre masquée : plus aucun rendu, et le minuteur ne se réveille
+        # plus que lorsque l'icône change d'image ou à l'échéance.
+        self.tray_mode = True
+        self.ensureTray()
+        QApplication.setQuitOnLastWindowClosed(False)
+        self.hide()
+        self.updateTray()
+        self.tray.show()
+
+    def leaveTrayMode(self):
+        if not self.tray_mode:
+            return
+        self.tray_mode = False
+        QApplication.setQuitOnLastWindowClosed(True)
+        self.timer.setTickInterval(1.0)
+        self.showNormal()
+        self.activateWindow()
+        self.tray.hide()
+        self.timer.resync()
+        self.progress_widget.setProgress(self.engine.remaining_seconds(), self.engine.total_seconds(),
+                                         self.current_session)
+
+    def onTrayActivated(self, reason):
+        if reason in (QSystemTrayIcon.ActivationReason.Trigger, QSystemTrayIcon.ActivationReason.DoubleClick):
+            self.leaveTrayMode()
+
+    def quitFromTray(self):
+        self.close()
+        QApplication.quit()
+
+    def updateTray(self):
+        total = self.engine.total_seconds()
+        self.timer.setTickInterval(total / TRAY_FRAMES if total else 1.0)
+        remaining = self.engine.countdown.remaining() if self.is_running else self.engine.remaining_seconds()
+        label = {"work": "Travail", "break": "Pause courte", "long_break": "Pause longue"}[self.current_session]
+        if self.engine.is_paused:
+            label += " (en pause)"
+        self.tray.setState(self.progress_widget.theme, self.current_session, 1 - remaining / total if total else 0,
+                           self.engine.remaining_seconds(), label)
+        self.tray.toggle_action.setText("Pause" if self.is_running else
+                                        "Reprendre" if self.engine.is_paused else "Démarrer")
 
     def toggleTimer(self):
-        if not self.is_running:
-            self.startCurrentSession()
-        else:
-            self.pauseTimer()
+        self.engine.toggle()
 
     def startCurrentSession(self):
-        duration = self.getSessionDuration(self.current_session)
-        self.timer.startSession(duration * 60, self.current_session)
-        self.is_running = True
-        self.start_pause_btn.setText("Pause")
-        self.updateSessionInfo()
+        self.engine.start()
 
     def pauseTimer(self):
-        self.timer.pause()
-        self.is_running = False
-        self.start_pause_btn.setText("Reprendre")
+        self.engine.pause()
 
     def resetTimer(self):
-        self.timer.reset()
-        self.is_running = False
-        self.start_pause_btn.setText("Démarrer")
-        duration = self.getSessionDuration(self.current_session)
-        self.progress_widget.setProgress(duration * 60, duration * 60, self.current_session)
+        self.engine.reset()
 
     def skipSession(self):
-        if self.is_running:
-            self.timer.reset()
-        self.onSessionCompleted(self.current_session)
+        self.engine.skip()
 
     def getSessionDuration(self, session_type):
-        s = self.settings_widget.settings
-        durations = {
-            "work": s["work_duration"],
-            "break": s["break_duration"],
-            "long_break": s["long_break_duration"]
-        }
-        return durations.get(session_type, 25)
+        return self.engine.session_duration(session_type)
 
     def updateDisplay(self, remaining_time):
-        duration = self.getSessionDuration(self.current_session)
-        self.progress_widget.setProgress(remaining_time, duration * 60, self.current_session)
-
-    def onSessionCompleted(self, session_type):
-        self.is_running = False
-        self.start_pause_btn.setText("Démarrer")
-        duration = self.getSessionDuration(session_type)
-        self.history_widget.addSession(session_type, duration * 60, datetime.now())
-        if session_type == "work":
-            self.session_count += 1
-            if self.session_count % self.settings_widget.settings["sessions_until_long_break"] == 0:
-                self.current_session = "long_break"
-            else:
-                self.current_session = "break"
+        if self.tray_mode:
+            self.updateTray()
         else:
-            self.current_session = "work"
-        should_auto = (
-            (self.current_session == "work" and self.settings_widget.settings["auto_start_work"]) or
-            (self.current_session in ["break","long_break"] and self.settings_widget.settings["auto_start_breaks"])
-        )
-        if should_auto:
-            QTimer.singleShot(2000, self.startCurrentSession)
+            self.progress_widget.setProgress(remaining_time, self.engine.total_seconds(), self.current_session)
+        if self.control_server is not None:
+            self.control_server.publish("tick", {"remaining": remaining_time, "session_type": self.current_session},
+                                        self.engine.status(), self.engine.countdown.deadline)
+
+    def onEngineEvent(self, event, data):
+        if self.control_server is not None:
+            self.control_server.publish(event, data, self.engine.status(), self.engine.countdown.deadline)
+        if event == "completed":
+            self.onSessionCompleted(data)
+        elif event == "reset":
+            duration = self.getSessionDuration(self.current_session)
+            self.progress_widget.setProgress(duration * 60, duration * 60, self.current_session)
+        elif event == "restored":
+            self.progress_widget.setProgress(data["remaining"], data["total"], data["session_type"])
+        self.progress_widget.setAnimating(self.engine.is_running)
+        if self.engine.is_running:
+            self.start_pause_btn.setText("Pause")
+        elif self.engine.is_paused:
+            self.start_pause_btn.setText("Reprendre")
         else:
-            self.resetTimer()
+            self.start_pause_btn.setText("Démarrer")
         self.updateSessionInfo()
+        if self.tray_mode:
+            self.updateTray()
+
+    def onSessionCompleted(self, record):
+        if self.history_widget is not None:
+            self.history_widget.addSession(record["session_type"], record["duration"],
+                                           datetime.fromtimestamp(record["completed_at"]), record["skipped"])
+        else:
+            self.history_store.add(record["session_type"], record["duration"], record["completed_at"],
+                                   record["skipped"])
+        if self.statistics_widget is not None:
+            self.statistics_widget.sessionAdded()
+        if not record["skipped"]:
+            self.notifier.sessionCompleted(record["session_type"], self.current_session,
+                                           self.getSessionDuration(self.current_session))
+        if not record["auto_start"]:
+            duration = self.getSessionDuration(self.current_session)
+            self.progress_widget.setProgress(duration * 60, duration * 60, self.current_session)
+        self.applyRetention()
+
+    def applyRetention(self):
+        # Consolide les séances sorties de la période conservée ; sans rien à
+        # consolider, ne coûte qu'une lecture d'index.
+        months = self.settings["retention_months"]
+        if not months:
+            return
+        try:
+            rolled = self.history_store.roll_up(retention_cutoff(months))
+        except Exception as e:
+            print(f"Erreur lors de la consolidation de l'historique : {e}")
+            return
+        if rolled and self.history_widget is not None and self.history_widget._loaded:
+            self.history_widget.history_model.reload()
 
     def updateSessionInfo(self):
         session_names = {"work":"Séance de travail", "break":"Pause courte", "long_break":"Pause longue"}
@@ -678,44 +2080,71 @@ class PomodoroApp(QMainWindow):
         else:
             self.session_info.setText(f"Prêt pour : {session_names[self.current_session]}")
 
-    def applySettings(self, settings):
-        self.progress_widget.setTheme(settings["theme"])
-        if not self.is_running:
+    def applySettings(self, settings, persist=True):
+        # Seules les clés réellement modifiées déclenchent du travail.
+        changes = diff_settings(self.settings, settings)
+        if not changes:
+            return
+        self.settings.update(changes)
+        self.engine.update_settings(changes)
+        durations = {"work_duration", "break_duration", "long_break_duration"}
+        if durations & changes.keys() and not self.is_running:
             self.resetTimer()
-        if settings.get("mode_zen",False):
-            self.progress_widget.setTheme("zen")
-            self.setStyleSheet("QMainWindow{background:#f9f6ef;}")
-        else:
-            self.setStyleSheet("QMainWindow{background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #F8F9FA, stop:1 #E9ECEF);}")
+        if "mode_zen" in changes:
+            self.progress_widget.setAnimationsEnabled(not self.settings["mode_zen"])
+        if {"sound_enabled", "notifications", "mode_zen"} & changes.keys():
+            self.notifier.configure(self.settings)
+        if "retention_months" in changes and STARTUP.finished:
+            self.applyRetention()
+        if {"theme", "mode_zen"} & changes.keys():
+            zen = self.settings["mode_zen"]
+            self.progress_widget.setTheme(THEMES.resolve(self.settings["theme"], zen))
+            StyleEngine.apply(self.settings["theme"], zen)
+        if persist:
+            self._save_timer.start()
 
     def loadSettings(self):
-        try:
-            with open("pomodoro_settings.json", "r") as f:
-                settings = json.load(f)
-                self.settings_widget.settings.update(settings)
-                self.settings_widget.work_spin.setValue(settings.get("work_duration", 25))
-                self.settings_widget.break_spin.setValue(settings.get("break_duration", 5))
-                self.settings_widget.long_break_spin.setValue(settings.get("long_break_duration", 15))
-                self.settings_widget.sessions_spin.setValue(settings.get("sessions_until_long_break", 4))
-                self.settings_widget.theme_combo.setCurrentText(settings.get("theme", "modern"))
-                self.applySettings(settings)
-        except Exception as e:
-            print(f"Erreur lors du chargement : {e}")
+        self.applySettings(self.settings_store.load(), persist=False)
+        self.notifier.configure(self.settings)
 
     def saveSettings(self):
+        self._save_timer.stop()
         try:
-            with open("pomodoro_settings.json", "w") as f:
-                json.dump(self.settings_widget.settings, f)
-        except Exception as e:
+            self.settings_store.save(self.settings)
+        except OSError as e:
             print(f"Erreur lors de la sauvegarde : {e}")
 
     def closeEvent(self, event):
-        self.saveSettings()
+        if self.settings_widget is not None:
+            self.settings_widget.flush()
+        if self._save_timer.isActive():
+            self.saveSettings()
+        if self._metrics_path:
+            self.dumpMetrics()
+        if self.control_server is not None:
+            self.control_server.stop()
+            self.control_server = None
+        if self.journal is not None:
+            self.journal.close()
+        self.notifier.shutdown()
+        if self.tray is not None:
+            self.tray.hide()
         event.accept()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
+    STARTUP.mark("qapplication")
     window = PomodoroApp()
     window.show()
+    action = cli_action(sys.argv)
+    if action in ("start", "toggle"):
+        # Après une reprise du journal, la séance restaurée continue :
+        # reprise si elle était en pause, démarrage seulement au repos.
+        if window.engine.is_paused:
+            window.engine.resume()
+        elif not window.engine.is_running:
+            window.engine.start()
+    elif action not in (None, "show"):
+        getattr(window.engine, action)()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""Packs de thèmes de Pomodoro Pro Ultra.
+
+Un pack est un fichier JSON, lu dans themes/ à côté de l'application puis
+dans le sous-répertoire themes/ du répertoire de configuration (prioritaire
+à nom égal) :
+
+    {"name": "forest", "label": "Forêt",
+     "arc": {"work": "#2ECC71", "break": "#27AE60", "long_break": "#16A085"}}
+
+Clés facultatives : order (rang dans la liste), warning et critical (arc en
+fin de séance), dial et window (une couleur, ou deux pour un dégradé),
+accent, text et label_color. Chaque pack est validé une seule fois, au
+chargement ; un pack invalide est ignoré avec un message.
+"""
+import json
+import os
+import re
+import sys
+
+from pomodoro_core import SESSION_TYPES, user_config_dir
+
+DEFAULT_THEME = "modern"
+# Pack utilisé à la place du thème choisi quand le mode Zen est actif.
+ZEN_THEME = "zen"
+BUILTIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "themes")
+
+_HEX = re.compile(r"#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{6})")
+_NAME = re.compile(r"[a-z0-9_-]+")
+
+DEFAULTS = {
+    "order": 100,
+    "warning": "#FFA502",
+    "critical": "#FF4757",
+    "dial": ["#F8FAFC", "#E9ECEF"],
+    "window": ["#F8F9FA", "#E9ECEF"],
+    "accent": "#4ECDC4",
+    "text": "#212121",
+    "label_color": "#646464"
+}
+
+# Garantit au moins un thème si aucun pack n'est lisible.
+FALLBACK = {
+    "name": DEFAULT_THEME,
+    "label": "Moderne",
+    "arc": {"work": "#FF6B6B", "break": "#4ECDC4", "long_break": "#45B7D1"}
+}
+
+
+def _color(value, field):
+    if not isinstance(value, str) or not _HEX.fullmatch(value):
+        raise ValueError(f"{field} : couleur hexadécimale attendue, pas {value!r}")
+    return value.upper()
+
+
+def _gradient(value, field):
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not 1 <= len(value) <= 2:
+        raise ValueError(f"{field} : une ou deux couleurs attendues")
+    return [_color(c, field) for c in value]
+
+
+def validate_theme(raw, name=None):
+    """Pack complet et normalisé ; lève ValueError si raw n'est pas un pack valide."""
+    if not isinstance(raw, dict):
+        raise ValueError("objet JSON attendu")
+    name = raw.get("name", name)
+    if not isinstance(name, str) or not _NAME.fullmatch(name):
+        raise ValueError(f"nom de thème invalide : {name!r}")
+    arc = raw.get("arc")
+    if not isinstance(arc, dict):
+        raise ValueError("arc : objet attendu")
+    pack = {
+        "name": name,
+        "label": raw.get("label") if isinstance(raw.get("label"), str) else name,
+        "arc": {t: _color(arc.get(t), f"arc.{t}") for t in SESSION_TYPES}
+    }
+    order = raw.get("order", DEFAULTS["order"])
+    if not isinstance(order, int) or isinstance(order, bool):
+        raise ValueError("order : entier attendu")
+    pack["order"] = order
+    for field in ("warning", "critical", "accent", "text", "label_color"):
+        pack[field] = _color(raw.get(field, DEFAULTS[field]), field)
+    for field in ("dial", "window"):
+        pack[field] = _gradient(raw.get(field, DEFAULTS[field]), field)
+    return pack
+
+
+def theme_dirs():
+    return [BUILTIN_DIR, os.path.join(user_config_dir(), "themes")]
+
+
+def load_theme_packs(dirs=None):
+    """Packs valides par nom, triés par (order, nom)."""
+    packs = {}
+    for directory in theme_dirs() if dirs is None else dirs:
+        try:
+            entries = sorted(os.listdir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.endswith(".json"):
+                continue
+            path = os.path.join(directory, entry)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    pack = validate_theme(json.load(f), entry[:-len(".json")])
+            except (OSError, ValueError) as e:
+                print(f"Thème ignoré ({path}) : {e}", file=sys.stderr)
+                continue
+            packs[pack["name"]] = pack
+    if DEFAULT_THEME not in packs:
+        packs[DEFAULT_THEME] = validate_theme(FALLBACK)
+    return dict(sorted(packs.items(), key=lambda item: (item[1]["order"], item[0])))
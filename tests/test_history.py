@@ -0,0 +1,124 @@
+import os
+import random
+import tempfile
+import time
+import unittest
+
+from pomodoro_analytics import Analytics
+from pomodoro_history import HistoryStore, StatsAggregator
+
+DAY = 86400
+# Heure d'été incluse : les jours locaux ne font pas toujours 24 heures.
+TIMEZONE = "Europe/Paris"
+
+
+def synthetic_history(days=730, seed=0):
+    """Séances (type, durée, horodatage, passée) sur `days` jours, avec des
+    jours sans séance pour couper les séries."""
+    rng = random.Random(seed)
+    start = time.mktime((2023, 1, 1, 0, 0, 0, 0, 0, -1))
+    rows = []
+    for day in range(days):
+        if rng.random() < 0.2:
+            continue
+        midnight = time.mktime((2023, 1, 1 + day, 0, 0, 0, 0, 0, -1))
+        at = midnight + rng.randrange(6 * 3600, 23 * 3600)
+        for _ in range(rng.randrange(1, 9)):
+            at += 25 * 60
+            rows.append(("work", 25 * 60, at, rng.random() < 0.1))
+            at += 5 * 60
+            rows.append(("break", 5 * 60, at, rng.random() < 0.3))
+            at += rng.randrange(0, 3600)
+        if rng.random() < 0.3:
+            at += 15 * 60
+            rows.append(("long_break", 15 * 60, at, False))
+    return start, rows
+
+
+def totals(store):
+    stats = StatsAggregator()
+    with store.read_snapshot():
+        stats.rebuild(store.iter_sessions(), store.daily_rollups())
+    analytics = Analytics()
+    analytics.refresh(store)
+    return {
+        "count": stats.count,
+        "total_minutes": stats.total_minutes,
+        "days": stats.days,
+        "weeks": stats.weeks,
+        "last_day": stats.last_day,
+        "run": stats.run,
+        "longest_streak": stats.longest_streak,
+        "completed": list(analytics.completed),
+        "skipped": list(analytics.skipped),
+        "minutes": list(analytics.minutes),
+        "heatmap": list(analytics.heatmap),
+        "day_minutes": analytics.day_minutes
+    }
+
+
+class RollUpTest(unittest.TestCase):
+    """roll_up() ne change aucun total, série ou carte de chaleur."""
+
+    @classmethod
+    def setUpClass(cls):
+        previous = os.environ.get("TZ")
+        os.environ["TZ"] = TIMEZONE
+        time.tzset()
+        cls.addClassCleanup(cls._restoreTimezone, previous)
+
+    @staticmethod
+    def _restoreTimezone(previous):
+        if previous is None:
+            os.environ.pop("TZ", None)
+        else:
+            os.environ["TZ"] = previous
+        time.tzset()
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = HistoryStore(os.path.join(tmp.name, "history.sqlite3"))
+        self.addCleanup(self.store.close)
+        self.start, self.rows = synthetic_history()
+        self.store.add_many(self.rows)
+
+    def test_totals_unchanged_after_roll_up(self):
+        expected = totals(self.store)
+        # Coupure en milieu de journée : un même jour est à la fois consolidé et détaillé.
+        cutoff = self.start + 500 * DAY + 13 * 3600
+        rolled = self.store.roll_up(cutoff)
+        self.assertEqual(rolled, sum(1 for row in self.rows if row[2] < cutoff))
+        self.assertEqual(self.store.count(), len(self.rows) - rolled)
+        self.assertEqual(totals(self.store), expected)
+
+    def test_successive_roll_ups(self):
+        expected = totals(self.store)
+        for months in (6, 12, 12, 18, 24):
+            self.store.roll_up(self.start + months * 30 * DAY + 9 * 3600)
+            self.assertEqual(totals(self.store), expected)
+        self.assertEqual(self.store.roll_up(self.start), 0)
+
+    def test_incremental_analytics_across_roll_up(self):
+        analytics = Analytics()
+        analytics.refresh(self.store)
+        self.store.roll_up(self.start + 400 * DAY)
+        extra = ("work", 25 * 60, self.rows[-1][2] + DAY, False)
+        self.store.add_many([extra])
+        analytics.refresh(self.store)
+        after = totals(self.store)
+        self.assertEqual(list(analytics.completed), after["completed"])
+        self.assertEqual(analytics.day_minutes, after["day_minutes"])
+        self.assertEqual(list(analytics.heatmap), after["heatmap"])
+
+    def test_import_before_rolled_until_is_dropped(self):
+        cutoff = self.start + 300 * DAY
+        self.store.roll_up(cutoff)
+        expected = totals(self.store)
+        old = [row for row in self.rows if row[2] < cutoff][:50]
+        self.assertEqual(self.store.add_many(old), (0, len(old)))
+        self.assertEqual(totals(self.store), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import os
+import tempfile
+import unittest
+
+from pomodoro_core import SessionEngine, SessionJournal, VirtualClock, resume_or_start
+
+WALL_START = 1_700_000_000.0
+
+
+class SessionJournalTest(unittest.TestCase):
+    """Reprise du moteur depuis l'instantané et le journal, sans Qt."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+        self.clock = VirtualClock(start=1000.0, wall_start=WALL_START)
+
+    def engine(self, clock=None):
+        clock = clock or self.clock
+        return SessionEngine(clock=clock, wall_clock=clock.wall)
+
+    def journal(self, compact_every=64):
+        return SessionJournal(self.directory, compact_every=compact_every)
+
+    def run_sessions(self, engine):
+        engine.start()
+        self.clock.sleep(300)
+        engine.pause()
+        self.clock.sleep(60)
+        engine.resume()
+        self.clock.advance_to(engine.next_wakeup())
+        engine.advance()
+        engine.start()
+        self.clock.sleep(30)
+
+    def test_replays_transitions(self):
+        engine, journal = self.engine(), self.journal()
+        journal.attach(engine)
+        self.run_sessions(engine)
+        journal.close()
+        self.assertEqual(self.journal().load(), engine.snapshot())
+
+    def test_torn_last_line_is_ignored(self):
+        engine, journal = self.engine(), self.journal()
+        journal.attach(engine)
+        self.run_sessions(engine)
+        expected = engine.snapshot()
+        journal.close()
+        with open(journal.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"seq": 99, "t": "pau')
+        reloaded = self.journal()
+        self.assertEqual(reloaded.load(), expected)
+        self.assertEqual(reloaded.seq, journal.seq)
+
+    def test_entries_covered_by_snapshot_are_skipped(self):
+        engine, journal = self.engine(), self.journal()
+        journal.attach(engine)
+        engine.start()
+        self.clock.sleep(120)
+        with open(journal.journal_path, encoding="utf-8") as f:
+            stale = f.read()
+        engine.pause()
+        journal.compact()
+        expected = engine.snapshot()
+        journal.close()
+        # Entrées antérieures à l'instantané, rejouées par erreur.
+        with open(journal.journal_path, "a", encoding="utf-8") as f:
+            f.write(stale)
+        reloaded = self.journal()
+        self.assertEqual(reloaded.load(), expected)
+        self.assertTrue(reloaded.load()["paused"])
+
+    def test_crash_between_replace_and_truncate(self):
+        engine, journal = self.engine(), self.journal(compact_every=4)
+        journal.attach(engine)
+        engine.start()
+        self.clock.sleep(60)
+        engine.pause()
+        self.clock.sleep(60)
+        engine.resume()
+        with open(journal.journal_path, encoding="utf-8") as f:
+            before_compaction = f.read()
+        engine.pause()  # quatrième entrée : compactage
+        self.assertEqual(os.path.getsize(journal.journal_path), 0)
+        expected = engine.snapshot()
+        journal.close()
+        # Arrêt après os.replace() : le journal n'a pas encore été vidé.
+        with open(journal.journal_path, "w", encoding="utf-8") as f:
+            f.write(before_compaction)
+        self.assertEqual(self.journal().load(), expected)
+
+        # La numérotation reprend après l'instantané, les nouvelles entrées comptent.
+        engine = self.engine()
+        journal = self.journal(compact_every=4)
+        journal.attach(engine)
+        self.assertTrue(engine.is_paused)
+        engine.resume()
+        journal.close()
+        self.assertEqual(self.journal().load(), engine.snapshot())
+
+    def test_deadline_expired_while_down(self):
+        engine, journal = self.engine(), self.journal()
+        journal.attach(engine)
+        engine.start()
+        self.clock.sleep(60)
+        journal.close()
+
+        # Redémarrage une heure plus tard, sur une horloge monotone repartie de zéro.
+        later = VirtualClock(start=0.0, wall_start=self.clock.wall() + 3600)
+        restarted = SessionEngine(clock=later, wall_clock=later.wall)
+        events = []
+        restarted.subscribe(lambda event, data: events.append(event))
+        journal = self.journal()
+        journal.attach(restarted)
+        self.addCleanup(journal.close)
+        self.assertTrue(restarted.is_running)
+        self.assertEqual(restarted.remaining_seconds(), 0)
+        restarted.advance()
+        self.assertEqual(events, ["restored", "completed"])
+        self.assertEqual(restarted.current_session, "break")
+        self.assertEqual(restarted.session_count, 1)
+
+    def test_deadline_still_pending_after_restart(self):
+        engine, journal = self.engine(), self.journal()
+        journal.attach(engine)
+        engine.start()
+        self.clock.sleep(60)
+        remaining = engine.remaining_seconds()
+        journal.close()
+
+        later = VirtualClock(start=0.0, wall_start=self.clock.wall() + 120)
+        restarted = SessionEngine(clock=later, wall_clock=later.wall)
+        self.journal().attach(restarted)
+        self.assertEqual(restarted.remaining_seconds(), remaining - 120)
+
+    def test_resume_or_start_keeps_restored_session(self):
+        engine, journal = self.engine(), self.journal()
+        journal.attach(engine)
+        engine.start()
+        self.clock.sleep(300)
+        engine.pause()
+        remaining = engine.remaining_seconds()
+        journal.close()
+
+        restarted, journal = self.engine(), self.journal()
+        resume_or_start(restarted, journal)
+        self.addCleanup(journal.close)
+        self.assertTrue(restarted.is_paused)
+        self.assertEqual(restarted.remaining_seconds(), remaining)
+
+    def test_resume_or_start_without_state(self):
+        engine, journal = self.engine(), self.journal()
+        resume_or_start(engine, journal)
+        self.addCleanup(journal.close)
+        self.assertTrue(engine.is_running)
+
+
+if __name__ == "__main__":
+    unittest.main()